@@ -1,15 +1,31 @@
+import argparse
+import cProfile
+import fnmatch
+import hashlib
+import heapq
 import json
 import os
 import re
-from dataclasses import dataclass, field
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field, replace
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
 
 
 # Paths
 SCRIPT_PATH = Path(__file__).resolve()
 OUTPUT_ROOT = SCRIPT_PATH.parents[1]
 RUNBOOK_ROOT = OUTPUT_ROOT.parent
+CACHE_PATH = OUTPUT_ROOT / "cache" / "scan_cache.json"
 
 
 # Patterns
@@ -27,6 +43,10 @@ ADDITIONAL_PATTERNS = [
     "JOURNAL.md",
 ]
 
+# Directory names never descended into during discovery
+ROOT_OUTPUT_DIR = "_runbook_audit"  # default output directory of a tree audited with --root
+DEFAULT_EXCLUDES = (".git", "node_modules", "Archive", ROOT_OUTPUT_DIR)
+
 REST_PATTERN = re.compile(r"\b(GET|POST|PUT|PATCH|DELETE)\s+(/[A-Za-z0-9_\-\/:{}]+)")
 IPC_PATTERN = re.compile(r"\b(IPC|channel|port|invoke|handle)\b", re.IGNORECASE)
 SCHEMA_PATTERN = re.compile(r"\b(LegalDocument|Schema|JSON Schema|Zod)\b", re.IGNORECASE)
@@ -38,21 +58,76 @@ VERIFICATION_PATTERN = re.compile(
 RISK_PATTERN = re.compile(r"\b(HIGH RISK|risk|blocker|failure mode|sharp edge)\b", re.IGNORECASE)
 INVARIANT_PATTERN = re.compile(r"\binvariant\b", re.IGNORECASE)
 FILE_PATTERN = re.compile(r"\b[\w\.-]+\.(pdf|docx|json|txt|csv|yaml|yml|md)\b", re.IGNORECASE)
+HEADING_PATTERN = re.compile(r"^(#+)\s+(.*)")
+FENCE_PATTERN = re.compile(r"^ {0,3}(`{3,}|~{3,})\s*([^`\s]*)")
+# The heading or line right before a shell fence that marks it as a verification step
+VERIFICATION_CUE_PATTERN = re.compile(r"\bverif(?:y|ied|ies|ication)\b", re.IGNORECASE)
+SHELL_PROMPT_PATTERN = re.compile(r"^(?:\$|>|PS>)\s+")
+SHELL_FENCES = frozenset({"bash", "sh", "shell", "console", "zsh", "powershell", "pwsh", "ps1", "cmd", "bat"})
+# Inside code fences: comment lines (prose again) and IPC channel calls, named by the channel
+CODE_COMMENT_PATTERN = re.compile(r"^\s*(?://|#(?!!)|/\*|\*|--|<!--)")
+IPC_CALL_PATTERN = re.compile(r"""\b\w*ipc\w*\.(?:invoke|handle|handleOnce|on|once|send|sendSync)\(\s*['"`]([^'"`]+)['"`]""", re.IGNORECASE)
+
+# Card sections, each taken from the first heading whose title contains one of
+# its keywords (case-insensitive).
+SECTION_KEYWORDS: Dict[str, Tuple[str, ...]] = {
+    "purpose": ("purpose",),
+    "produces": ("produce", "artifact", "output"),
+    "consumes": ("consume", "prereq", "input"),
+    "lifecycle": ("process", "lifecycle", "startup", "shutdown"),
+}
 
 
 COLOR_ORDER = ["RED", "YELLOW", "GREEN"]
 
 
-@dataclass
+@dataclass(slots=True)
 class DetectedEntry:
     kind: str
     name: str
     details: Dict[str, str]
     source: str
-    snippet: str
     file: str
     line_start: int
     line_end: int
+    text: str = field(default="", repr=False)  # source line; the snippet is derived lazily
+    _snippet: Optional[str] = field(default=None, repr=False, compare=False)
+
+    @property
+    def snippet(self) -> str:
+        if self._snippet is None:
+            self._snippet = make_snippet(self.text)
+        return self._snippet
+
+
+@dataclass(slots=True)
+class EntryGroup:
+    kind: str
+    name: str
+    occurrences: List[DetectedEntry]
+
+    @property
+    def first(self) -> DetectedEntry:
+        return self.occurrences[0]
+
+    @property
+    def files(self) -> List[str]:
+        return list(dict.fromkeys(e.file for e in self.occurrences))
+
+    def other_sources(self) -> str:
+        return ", ".join(e.source for e in self.occurrences[1:])
+
+
+@dataclass(slots=True)
+class Block:
+    """One markdown block; offset is the character offset of line_start in the "\\n"-joined file."""
+
+    kind: str  # heading, code, table or paragraph
+    line_start: int
+    line_end: int
+    offset: int
+    level: int = 0  # heading level
+    info: str = ""  # heading title, or the code fence language
 
 
 @dataclass
@@ -70,6 +145,50 @@ class FileData:
     invariants: List[DetectedEntry] = field(default_factory=list)
     files: List[DetectedEntry] = field(default_factory=list)
     headings: List[Tuple[int, int, str]] = field(default_factory=list)  # (line, level, title)
+    blocks: List[Block] = field(default_factory=list)
+    sections: Dict[str, Tuple[int, int]] = field(default_factory=dict)  # SECTION_KEYWORDS name -> (start, end)
+    from_cache: bool = False
+
+
+# rel_path -> (card, todos, (has_purpose, has_produces, has_consumes))
+CardCache = Dict[str, Tuple[str, List[str], Tuple[bool, bool, bool]]]
+
+
+def cpu_seconds() -> float:
+    # Includes reaped children, so --jobs workers count once the pool shuts down.
+    t = os.times()
+    return t.user + t.system + t.children_user + t.children_system
+
+
+class StageTimer:
+    """Wall-clock and CPU seconds per named stage, summed over repeated entries.
+
+    Stages may run on report threads; those book their own thread's CPU time,
+    so overlapping stages are not charged for each other's work.
+    """
+
+    def __init__(self) -> None:
+        self.wall: Dict[str, float] = {}
+        self.cpu: Dict[str, float] = {}
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        clock = cpu_seconds if threading.current_thread() is threading.main_thread() else time.thread_time
+        start = time.perf_counter()
+        start_cpu = clock()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - start
+            cpu = clock() - start_cpu
+            with self.lock:
+                self.wall[name] = self.wall.get(name, 0.0) + wall
+                self.cpu[name] = self.cpu.get(name, 0.0) + cpu
+
+
+# FileData attributes holding DetectedEntry lists, in scan order.
+ENTRY_FIELDS = ["rest", "ipc", "schemas", "verifications", "risks", "invariants", "files"]
 
 
 def make_snippet(text: str, word_limit: int = 25) -> str:
@@ -90,10 +209,111 @@ def ensure_dirs() -> None:
         d.mkdir(parents=True, exist_ok=True)
 
 
+@lru_cache(maxsize=None)
+def compile_globs(patterns: Tuple[str, ...]) -> re.Pattern[str]:
+    """One regex matching any of the fnmatch patterns (same case rules as fnmatch)."""
+    return re.compile("|".join(fnmatch.translate(os.path.normcase(pat)) for pat in patterns))
+
+
 def matches_pattern(name: str, patterns: List[str]) -> bool:
-    from fnmatch import fnmatch
+    return compile_globs(tuple(patterns)).match(os.path.normcase(name)) is not None
+
 
-    return any(fnmatch(name, pat) for pat in patterns)
+# Minimal .gitignore support: blank lines, comments, "!" negation, trailing
+# "/" for directories, anchored patterns and "**". Rules from deeper files
+# are added later while walking and therefore take precedence.
+@dataclass
+class IgnoreRule:
+    base: str
+    regex: re.Pattern[str]
+    negate: bool
+    dir_only: bool
+    anchored: bool
+
+
+def gitignore_regex(pattern: str) -> re.Pattern[str]:
+    out: List[str] = []
+    i, n = 0, len(pattern)
+    while i < n:
+        if pattern.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("**", i):
+            out.append(".*")
+            i += 2
+        elif pattern[i] == "*":
+            out.append("[^/]*")
+            i += 1
+        elif pattern[i] == "?":
+            out.append("[^/]")
+            i += 1
+        elif pattern[i] == "[" and "]" in pattern[i + 2 :]:
+            end = pattern.index("]", i + 2)
+            body = pattern[i + 1 : end]
+            if body.startswith("!"):
+                body = "^" + body[1:]
+            out.append("[" + body.replace("\\", "\\\\") + "]")
+            i = end + 1
+        elif pattern[i] == "\\" and i + 1 < n:
+            out.append(re.escape(pattern[i + 1]))
+            i += 2
+        else:
+            out.append(re.escape(pattern[i]))
+            i += 1
+    return re.compile("".join(out) + r"\Z")
+
+
+class GitIgnore:
+    def __init__(self) -> None:
+        self.rules: List[IgnoreRule] = []
+
+    def add_file(self, path: Path) -> None:
+        try:
+            text = path.read_text(encoding="utf-8")
+        except (OSError, UnicodeDecodeError):
+            return
+        base = path.parent.as_posix()
+        for raw_line in text.splitlines():
+            line = raw_line.rstrip()
+            if not line or line.startswith("#"):
+                continue
+            negate = line.startswith("!")
+            if negate:
+                line = line[1:]
+            dir_only = line.endswith("/")
+            line = line.rstrip("/")
+            anchored = "/" in line
+            line = line.lstrip("/")
+            if line:
+                self.rules.append(IgnoreRule(base, gitignore_regex(line), negate, dir_only, anchored))
+
+    def ignored(self, path: str, is_dir: bool) -> bool:
+        for rule in reversed(self.rules):
+            if rule.dir_only and not is_dir:
+                continue
+            if not path.startswith(rule.base + "/"):
+                continue
+            rel = path[len(rule.base) + 1 :]
+            target = rel if rule.anchored else rel.rsplit("/", 1)[-1]
+            if rule.regex.match(target):
+                return not rule.negate
+        return False
+
+
+def load_gitignore(root: Path) -> GitIgnore:
+    """Collect .gitignore files from the enclosing git checkout down to root."""
+    gitignore = GitIgnore()
+    ancestors = [root, *root.parents]
+    for idx, directory in enumerate(ancestors):
+        if (directory / ".git").exists():
+            for parent in reversed(ancestors[1 : idx + 1]):
+                gitignore.add_file(parent / ".gitignore")
+            break
+    return gitignore
+
+
+RUNBOOK_GLOBS = compile_globs(tuple(RUNBOOK_PATTERNS))
+ADDITIONAL_GLOBS = compile_globs(tuple(ADDITIONAL_PATTERNS))
 
 
 def extract_runbook_number(name: str) -> Optional[int]:
@@ -106,90 +326,728 @@ def extract_runbook_number(name: str) -> Optional[int]:
     return None
 
 
-def discover_files() -> List[FileData]:
-    discovered: List[FileData] = []
-    for root, dirs, files in os.walk(RUNBOOK_ROOT):
-        # Skip output directory
-        if "_runbook_audit" in root.split(os.sep):
+def tokenize_markdown(lines: List[str]) -> List[Block]:
+    blocks: List[Block] = []
+    current: Optional[Block] = None
+    fence: Optional[str] = None
+    offset = 0
+    for idx, line in enumerate(lines, 1):
+        line_offset = offset
+        offset += len(line) + 1
+        if fence is not None:
+            current.line_end = idx
+            stripped = line.strip()
+            if len(stripped) >= len(fence) and stripped == fence[0] * len(stripped) and not line.startswith("    "):
+                fence = None
+                current = None
             continue
+        m = FENCE_PATTERN.match(line)
+        if m:
+            fence = m.group(1)
+            current = Block("code", idx, idx, line_offset, info=m.group(2).lower())
+            blocks.append(current)
+            continue
+        m = HEADING_PATTERN.match(line)
+        if m:
+            blocks.append(Block("heading", idx, idx, line_offset, len(m.group(1)), m.group(2).strip()))
+            current = None
+            continue
+        stripped = line.strip()
+        if not stripped:
+            current = None
+            continue
+        kind = "table" if stripped.startswith("|") else "paragraph"
+        if current is not None and current.kind == kind:
+            current.line_end = idx
+        else:
+            current = Block(kind, idx, idx, line_offset)
+            blocks.append(current)
+    return blocks
+
+
+def index_sections(headings: List[Tuple[int, int, str]], line_count: int) -> Dict[str, Tuple[int, int]]:
+    """Map each SECTION_KEYWORDS name to the line span under its first matching heading."""
+    sections: Dict[str, Tuple[int, int]] = {}
+    for i, (line_no, _, title) in enumerate(headings):
+        lowered = title.lower()
+        for name, keywords in SECTION_KEYWORDS.items():
+            if name not in sections and any(k in lowered for k in keywords):
+                end = headings[i + 1][0] - 1 if i + 1 < len(headings) else line_count
+                sections[name] = (line_no + 1, end)
+        if len(sections) == len(SECTION_KEYWORDS):
+            break
+    return sections
+
+
+def load_file_data(file_path: Path, rel_path: str, is_runbook: bool, runbook_number: Optional[int], raw: Optional[bytes] = None, record: Optional[Dict] = None) -> FileData:
+    if raw is None:
+        raw = file_path.read_bytes()
+    lines = raw.decode("utf-8").splitlines()
+    if record is not None:
+        blocks = [Block(*b) for b in record["blocks"]]
+    else:
+        blocks = tokenize_markdown(lines)
+    headings = [(b.line_start, b.level, b.info) for b in blocks if b.kind == "heading"]
+    fd = FileData(
+        path=file_path,
+        rel_path=rel_path,
+        is_runbook=is_runbook,
+        runbook_number=runbook_number,
+        lines=lines,
+        headings=headings,
+        blocks=blocks,
+        sections=index_sections(headings, len(lines)),
+        from_cache=record is not None,
+    )
+    if record is not None:
+        for attr in ENTRY_FIELDS:
+            setattr(fd, attr, [entry_from_record(e, rel_path, lines) for e in record["entries"][attr]])
+    return fd
+
+
+PathInfo = Tuple[Path, str, bool, Optional[int]]  # (path, rel_path, is_runbook, runbook_number)
+
+
+def classify_markdown(filename: str) -> Optional[Tuple[bool, Optional[int]]]:
+    """(is_runbook, runbook_number) for a file name the audit covers, else None."""
+    if not filename.lower().endswith(".md"):
+        return None
+    is_runbook = RUNBOOK_GLOBS.match(os.path.normcase(filename)) is not None
+    if not is_runbook and ADDITIONAL_GLOBS.match(os.path.normcase(filename)) is None:
+        return None
+    return is_runbook, extract_runbook_number(filename) if is_runbook else None
+
+
+def discover_paths(excludes: Sequence[str] = DEFAULT_EXCLUDES, use_gitignore: bool = True, root: Optional[Path] = None, start: Optional[Path] = None, output_root: Optional[Path] = None) -> List[PathInfo]:
+    """Walk start (default: root) for auditable files; rel_paths are relative to root."""
+    root = root if root is not None else RUNBOOK_ROOT
+    output_root = output_root if output_root is not None else OUTPUT_ROOT
+    start = start if start is not None else root
+    discovered: List[PathInfo] = []
+    excluded_names = set(excludes)
+    gitignore = load_gitignore(start) if use_gitignore else None
+    for walk_root, dirs, files in os.walk(start):
+        root_posix = Path(walk_root).as_posix()
+        if gitignore is not None and ".gitignore" in files:
+            gitignore.add_file(Path(walk_root) / ".gitignore")
+        # Prune excluded and ignored directories (including our own output) before descending
+        dirs[:] = sorted(
+            d
+            for d in dirs
+            if d not in excluded_names
+            and Path(walk_root, d) != output_root
+            and not (gitignore is not None and gitignore.ignored(f"{root_posix}/{d}", True))
+        )
         for filename in files:
-            if not filename.lower().endswith(".md"):
+            kind = classify_markdown(filename)
+            if kind is None:
                 continue
-            rel_path = os.path.relpath(os.path.join(root, filename), RUNBOOK_ROOT)
-            is_runbook = matches_pattern(filename, RUNBOOK_PATTERNS)
-            include_additional = matches_pattern(filename, ADDITIONAL_PATTERNS)
-            if not is_runbook and not include_additional:
+            if gitignore is not None and gitignore.ignored(f"{root_posix}/{filename}", False):
                 continue
-            runbook_number = extract_runbook_number(filename) if is_runbook else None
-            file_path = RUNBOOK_ROOT / rel_path
-            lines = file_path.read_text(encoding="utf-8").splitlines()
-            headings = []
-            for idx, line in enumerate(lines, 1):
-                m = re.match(r"^(#+)\s+(.*)", line)
-                if m:
-                    headings.append((idx, len(m.group(1)), m.group(2).strip()))
-            discovered.append(
-                FileData(
-                    path=file_path,
-                    rel_path=rel_path,
-                    is_runbook=is_runbook,
-                    runbook_number=runbook_number,
-                    lines=lines,
-                    headings=headings,
-                )
-            )
+            rel_path = os.path.relpath(os.path.join(walk_root, filename), root)
+            discovered.append((root / rel_path, rel_path, *kind))
+    return discovered
+
+
+def collect_paths(paths: Sequence[Path], excludes: Sequence[str] = DEFAULT_EXCLUDES, use_gitignore: bool = True, root: Optional[Path] = None, output_root: Optional[Path] = None) -> List[PathInfo]:
+    """Discovery limited to the given files and directories.
+
+    Directories are walked as in discover_paths. Files are taken as given
+    (markdown only), so a file outside the usual name patterns can still be
+    audited on request. Relative paths are taken from root.
+    """
+    root = root if root is not None else RUNBOOK_ROOT
+    found: Dict[str, PathInfo] = {}
+    for path in paths:
+        path = root / path
+        if path.is_dir():
+            for path_info in discover_paths(excludes, use_gitignore, root, path, output_root):
+                found.setdefault(path_info[1], path_info)
+        elif path.suffix.lower() == ".md" and path.is_file():
+            is_runbook, number = classify_markdown(path.name) or (False, None)
+            rel_path = os.path.relpath(path, root)
+            found.setdefault(rel_path, (root / rel_path, rel_path, is_runbook, number))
+    return list(found.values())
+
+
+def sort_files(files: List[FileData]) -> None:
     # Sort runbooks numerically, others after
-    discovered.sort(key=lambda fd: (0 if fd.is_runbook else 1, fd.runbook_number or 999, fd.rel_path))
+    files.sort(key=lambda fd: (0 if fd.is_runbook else 1, fd.runbook_number or 999, fd.rel_path))
+
+
+def discover_files() -> List[FileData]:
+    discovered = [load_file_data(*path_info) for path_info in discover_paths()]
+    sort_files(discovered)
     return discovered
 
 
 def add_entry(entries: List[DetectedEntry], kind: str, name: str, details: Dict[str, str], rel_path: str, line_no: int, line_end: Optional[int], snippet_text: str) -> None:
     entry = DetectedEntry(
         kind=kind,
-        name=name.strip(),
+        name=sys.intern(name.strip()),
         details=details,
         source=f"{rel_path}:L{line_no}-L{line_end or line_no}",
-        snippet=make_snippet(snippet_text),
         file=rel_path,
         line_start=line_no,
         line_end=line_end or line_no,
+        text=snippet_text,
     )
     entries.append(entry)
 
 
-def scan_file(fd: FileData) -> None:
-    for idx, line in enumerate(fd.lines, 1):
-        rest_match = REST_PATTERN.search(line)
-        if rest_match:
-            method, path = rest_match.groups()
-            add_entry(fd.rest, "REST", f"{method} {path}", {}, fd.rel_path, idx, None, line)
-        if IPC_PATTERN.search(line):
-            add_entry(fd.ipc, "IPC", line.strip(), {}, fd.rel_path, idx, None, line)
-        schema_match = SCHEMA_PATTERN.search(line)
-        if schema_match:
-            add_entry(fd.schemas, "Schema", schema_match.group(0), {}, fd.rel_path, idx, None, line)
-        schema_iface = SCHEMA_INTERFACE_PATTERN.search(line)
-        if schema_iface:
-            add_entry(fd.schemas, "Schema", f"{schema_iface.group(1)} {schema_iface.group(2)}", {}, fd.rel_path, idx, None, line)
-        if VERIFICATION_PATTERN.search(line):
-            add_entry(fd.verifications, "Verification", line.strip(), {}, fd.rel_path, idx, None, line)
-        if RISK_PATTERN.search(line):
-            add_entry(fd.risks, "Risk", line.strip(), {}, fd.rel_path, idx, None, line)
-        if INVARIANT_PATTERN.search(line):
-            add_entry(fd.invariants, "Invariant", line.strip(), {}, fd.rel_path, idx, None, line)
-        file_match = FILE_PATTERN.search(line)
-        if file_match:
-            add_entry(fd.files, "File", file_match.group(0), {}, fd.rel_path, idx, None, line)
-
-
-def get_section(fd: FileData, keywords: List[str]) -> Tuple[Optional[str], Optional[int], Optional[int]]:
-    for i, (line_no, level, title) in enumerate(fd.headings):
-        if any(k.lower() in title.lower() for k in keywords):
-            start = line_no + 1
-            end = fd.headings[i + 1][0] - 1 if i + 1 < len(fd.headings) else len(fd.lines)
-            section_text = "\n".join(fd.lines[start - 1 : end]).strip()
-            return section_text if section_text else None, start, end
-    return None, None, None
+# Single-pass scanning engine.
+#
+# Each pattern becomes an optional lookahead inside one combined regex, so one
+# finditer over a line reports the leftmost start of every pattern that occurs
+# in it. The original pattern is then re-anchored at that start, which yields
+# exactly the match the per-regex path would have found.
+LINE_DETECTORS: List[Tuple[str, re.Pattern[str]]] = [
+    ("rest", REST_PATTERN),
+    ("ipc", IPC_PATTERN),
+    ("schema", SCHEMA_PATTERN),
+    ("schema_interface", SCHEMA_INTERFACE_PATTERN),
+    ("verification", VERIFICATION_PATTERN),
+    ("risk", RISK_PATTERN),
+    ("invariant", INVARIANT_PATTERN),
+    ("file", FILE_PATTERN),
+]
+
+# Literals of which at least one must occur in a line for the detector to
+# match. Case-insensitive detectors list lowercase literals and are checked
+# against the lowercased line, which is only sound for ASCII lines: IGNORECASE
+# also folds a few non-ASCII characters (e.g. KELVIN SIGN) that str.lower()
+# does not map, so non-ASCII lines bypass the prefilter.
+DETECTOR_LITERALS: Dict[str, Tuple[str, ...]] = {
+    "rest": ("GET", "POST", "PUT", "PATCH", "DELETE"),
+    "ipc": ("ipc", "channel", "port", "invoke", "handle"),
+    "schema": ("legaldocument", "schema", "zod"),
+    "schema_interface": ("interface", "type"),
+    "verification": ("verify", "run:", "command:", "drift-detector", "npm test", "pytest"),
+    "risk": ("risk", "blocker", "failure mode", "sharp edge"),
+    "invariant": ("invariant",),
+    "file": (".pdf", ".docx", ".json", ".txt", ".csv", ".yaml", ".yml", ".md"),
+}
+
+ALL_DETECTORS: Tuple[str, ...] = tuple(name for name, _ in LINE_DETECTORS)
+PREFILTERS: Tuple[Tuple[str, bool, Tuple[str, ...]], ...] = tuple(
+    (name, bool(pattern.flags & re.IGNORECASE), DETECTOR_LITERALS[name]) for name, pattern in LINE_DETECTORS
+)
+
+
+def _detector_body(pattern: re.Pattern[str]) -> str:
+    if pattern.flags & re.IGNORECASE:
+        return f"(?i:{pattern.pattern})"
+    return f"(?:{pattern.pattern})"
+
+
+@lru_cache(maxsize=None)
+def combined_line_pattern(names: Tuple[str, ...]) -> re.Pattern[str]:
+    """Merged alternation for the given detectors, one named group each."""
+    bodies = {name: _detector_body(pattern) for name, pattern in LINE_DETECTORS if name in names}
+    gate = "(?=" + "|".join(bodies.values()) + ")"
+    lookaheads = "".join(f"(?=(?P<{name}>{body}))?" for name, body in bodies.items())
+    return re.compile(gate + lookaheads)
+
+
+def detect_line_per_regex(line: str) -> Dict[str, int]:
+    """Reference engine: every pattern searched independently."""
+    starts: Dict[str, int] = {}
+    for name, pattern in LINE_DETECTORS:
+        m = pattern.search(line)
+        if m:
+            starts[name] = m.start()
+    return starts
+
+
+def detect_line(line: str) -> Dict[str, int]:
+    """Return {detector name: start of its first match} for one line."""
+    if line.isascii():
+        lowered = line.lower()
+        found: List[str] = []
+        for name, ignore_case, literals in PREFILTERS:
+            text = lowered if ignore_case else line
+            for lit in literals:
+                if lit in text:
+                    found.append(name)
+                    break
+        names = tuple(found)
+        if not names:
+            return {}
+    else:
+        names = ALL_DETECTORS
+    starts: Dict[str, int] = {}
+    for m in combined_line_pattern(names).finditer(line):
+        for name, value in m.groupdict().items():
+            if value is not None and name not in starts:
+                starts[name] = m.start(name)
+        if len(starts) == len(names):
+            break
+    return starts
+
+
+# Detectors that name something (an endpoint, a type, a file) apply to code
+# lines as well, and so does verification, whose code matches
+# scan_code_commands sorts into commands. IPC, risk and invariant take the
+# whole line as a statement, which only prose makes.
+CODE_DETECTORS = frozenset({"rest", "schema", "schema_interface", "file", "verification"})
+
+
+def scan_file(fd: FileData, detect: Callable[[str], Dict[str, int]] = detect_line) -> None:
+    """Run the line detectors over each of fd's blocks, as fits its kind.
+
+    Headings, paragraphs and tables are prose. Code lines only get
+    CODE_DETECTORS, and their IPC entries come from channel calls such as
+    ipcMain.handle('cases:update'), named by the channel. Comment lines in a
+    fence are prose again. detect is the line engine (detect_line, or
+    detect_line_per_regex for the parity check).
+    """
+    for block in fd.blocks:
+        if block.kind != "code":
+            for idx in range(block.line_start, block.line_end + 1):
+                scan_line(fd, idx, detect(fd.lines[idx - 1]))
+            continue
+        for idx in code_lines(fd, block):
+            line = fd.lines[idx - 1]
+            if CODE_COMMENT_PATTERN.match(line):
+                scan_line(fd, idx, detect(line))
+                continue
+            scan_line(fd, idx, {name: start for name, start in detect(line).items() if name in CODE_DETECTORS})
+            call = IPC_CALL_PATTERN.search(line)
+            if call:
+                add_entry(fd.ipc, "IPC", call.group(1), {}, fd.rel_path, idx, None, line)
+
+
+def code_lines(fd: FileData, block: Block) -> range:
+    """Line numbers inside a code block, without its fence lines."""
+    end = block.line_end
+    last = fd.lines[end - 1].strip()
+    if end > block.line_start and len(last) >= 3 and last[0] in "`~" and last == last[0] * len(last):
+        end -= 1
+    return range(block.line_start + 1, end + 1)
+
+
+def scan_line(fd: FileData, idx: int, starts: Dict[str, int]) -> None:
+    """Record the entries of line idx from its detector starts."""
+    if not starts:
+        return
+    line = fd.lines[idx - 1]
+    if "rest" in starts:
+        method, path = REST_PATTERN.match(line, starts["rest"]).groups()
+        add_entry(fd.rest, "REST", f"{method} {path}", {}, fd.rel_path, idx, None, line)
+    if "ipc" in starts:
+        add_entry(fd.ipc, "IPC", line.strip(), {}, fd.rel_path, idx, None, line)
+    if "schema" in starts:
+        schema_match = SCHEMA_PATTERN.match(line, starts["schema"])
+        add_entry(fd.schemas, "Schema", schema_match.group(0), {}, fd.rel_path, idx, None, line)
+    if "schema_interface" in starts:
+        schema_iface = SCHEMA_INTERFACE_PATTERN.match(line, starts["schema_interface"])
+        add_entry(fd.schemas, "Schema", f"{schema_iface.group(1)} {schema_iface.group(2)}", {}, fd.rel_path, idx, None, line)
+    if "verification" in starts:
+        add_entry(fd.verifications, "Verification", line.strip(), {}, fd.rel_path, idx, None, line)
+    if "risk" in starts:
+        add_entry(fd.risks, "Risk", line.strip(), {}, fd.rel_path, idx, None, line)
+    if "invariant" in starts:
+        add_entry(fd.invariants, "Invariant", line.strip(), {}, fd.rel_path, idx, None, line)
+    if "file" in starts:
+        file_match = FILE_PATTERN.match(line, starts["file"])
+        add_entry(fd.files, "File", file_match.group(0), {}, fd.rel_path, idx, None, line)
+
+
+def scan_code_commands(fd: FileData) -> None:
+    """Record verification lines inside code fences as commands.
+
+    Every command in a shell fence introduced by a verification cue (the
+    heading or line right before it) is a verification command; in other
+    shell or untagged fences only the lines the verification detector already
+    matched are.
+    """
+    by_line = {e.line_start: e for e in fd.verifications}
+    cued = False
+    added = False
+    for block in fd.blocks:
+        if block.kind == "heading":
+            cued = VERIFICATION_CUE_PATTERN.search(block.info) is not None
+            continue
+        if block.kind != "code":
+            cued = VERIFICATION_CUE_PATTERN.search(fd.lines[block.line_end - 1]) is not None
+            continue
+        if block.info in SHELL_FENCES or not block.info:
+            for idx in range(block.line_start + 1, block.line_end + 1):
+                command = SHELL_PROMPT_PATTERN.sub("", fd.lines[idx - 1].strip())
+                if not command or command.startswith(("#", "```", "~~~")):
+                    continue
+                entry = by_line.get(idx)
+                details = {"command": block.info or "sh"}
+                if entry is not None:
+                    entry.name = sys.intern(command)
+                    entry.details = details
+                elif cued and block.info:
+                    add_entry(fd.verifications, "Verification", command, details, fd.rel_path, idx, None, fd.lines[idx - 1])
+                    added = True
+        cued = False
+    if added:
+        fd.verifications.sort(key=lambda e: e.line_start)
+
+
+def check_scan_parity(files: List[FileData]) -> List[str]:
+    """Scan each file with both line engines and list the files whose entries differ."""
+    mismatched: List[str] = []
+    for fd in files:
+        reference = FileData(fd.path, fd.rel_path, fd.is_runbook, fd.runbook_number, fd.lines, blocks=fd.blocks)
+        candidate = FileData(fd.path, fd.rel_path, fd.is_runbook, fd.runbook_number, fd.lines, blocks=fd.blocks)
+        scan_file(reference, detect_line_per_regex)
+        scan_file(candidate)
+        if reference != candidate:
+            mismatched.append(fd.rel_path)
+    return mismatched
+
+
+# Incremental scan cache.
+#
+# Blocks and detected entries are stored per file, keyed by relative path.
+# A record is reused when mtime and size are unchanged, or failing that when
+# the content hash still matches. The fingerprint covers every pattern, so
+# editing a regex invalidates the whole cache.
+CACHE_VERSION = 4
+
+
+def entry_to_record(entry: DetectedEntry) -> List:
+    # The snippet text is always the source line, so it is re-read from the file.
+    return [entry.kind, entry.name, entry.details, entry.line_start, entry.line_end]
+
+
+def entry_from_record(record: List, rel_path: str, lines: List[str]) -> DetectedEntry:
+    kind, name, details, line_start, line_end = record
+    return DetectedEntry(
+        kind=kind,
+        name=sys.intern(name),
+        details=details,
+        source=f"{rel_path}:L{line_start}-L{line_end}",
+        file=rel_path,
+        line_start=line_start,
+        line_end=line_end,
+        text=lines[line_start - 1],
+    )
+
+
+def scanner_fingerprint() -> str:
+    digest = hashlib.sha256(f"v{CACHE_VERSION}\0{','.join(sorted(SHELL_FENCES))}".encode("utf-8"))
+    block_patterns = [
+        ("heading", HEADING_PATTERN),
+        ("fence", FENCE_PATTERN),
+        ("cue", VERIFICATION_CUE_PATTERN),
+        ("prompt", SHELL_PROMPT_PATTERN),
+        ("comment", CODE_COMMENT_PATTERN),
+        ("ipc_call", IPC_CALL_PATTERN),
+    ]
+    for name, pattern in LINE_DETECTORS + block_patterns:
+        digest.update(f"{name}\0{pattern.pattern}\0{int(pattern.flags)}\0".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def cache_stamp(st: os.stat_result, raw: bytes, record: Optional[Dict]) -> Dict:
+    stamp = {"mtime_ns": st.st_mtime_ns, "size": st.st_size}
+    if record is not None and record["mtime_ns"] == stamp["mtime_ns"] and record["size"] == stamp["size"]:
+        stamp["sha256"] = record["sha256"]
+    else:
+        stamp["sha256"] = hashlib.sha256(raw).hexdigest()
+    return stamp
+
+
+class ScanCache:
+    """Scan records per file, plus built runbook cards.
+
+    Cards depend on the report code as well as the file, so they are only
+    reused while this script is byte-for-byte the one that built them.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.fingerprint = scanner_fingerprint()
+        self.builder = hashlib.sha256(SCRIPT_PATH.read_bytes()).hexdigest()
+        self.records: Dict[str, Dict] = {}
+        self.cards: CardCache = {}
+        self.stamps: Dict[str, Dict] = {}
+        self.hits = 0
+
+    def load(self) -> None:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        self.restore(data)
+
+    def restore(self, data: Dict) -> None:
+        if data.get("fingerprint") == self.fingerprint:
+            self.records = data.get("files", {})
+            if data.get("builder") == self.builder:
+                self.cards = data.get("cards", {})
+
+    def clear(self) -> None:
+        self.records = {}
+        self.cards = {}
+        self.path.unlink(missing_ok=True)
+
+    def update(self, fd: FileData, stamp: Dict) -> None:
+        self.stamps[fd.rel_path] = stamp
+        if fd.from_cache:
+            self.hits += 1
+            self.records[fd.rel_path].update(stamp)
+            return
+        self.cards.pop(fd.rel_path, None)
+        self.records[fd.rel_path] = {
+            **stamp,
+            "blocks": [[b.kind, b.line_start, b.line_end, b.offset, b.level, b.info] for b in fd.blocks],
+            "entries": {attr: [entry_to_record(e) for e in getattr(fd, attr)] for attr in ENTRY_FIELDS},
+        }
+
+    def dump(self, prune: bool = True) -> Dict:
+        # Drop records for files that were not seen in this run, unless the
+        # run only looked at part of the tree.
+        kept = self.stamps if prune else self.records
+        files = {rel_path: self.records[rel_path] for rel_path in sorted(kept) if rel_path in self.records}
+        cards = {rel_path: self.cards[rel_path] for rel_path in files if rel_path in self.cards}
+        return {"fingerprint": self.fingerprint, "builder": self.builder, "files": files, "cards": cards}
+
+    def save(self, prune: bool = True) -> None:
+        save_json(self.path, self.dump(prune))
+
+
+def save_json(path: Path, data: Dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_text(json.dumps(data), encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+# Scan stage.
+#
+# Each task is self-contained (path, cached record, cache flag, content when
+# it does not come from disk) so it can run in a worker process under --jobs;
+# results are merged and sorted exactly as in the serial path, which keeps
+# every output byte-identical.
+ScanTask = Tuple[Path, str, bool, Optional[int], Optional[Dict], bool, Optional[bytes]]
+
+
+def read_and_scan(task: ScanTask) -> Tuple[FileData, Optional[Dict]]:
+    file_path, rel_path, is_runbook, runbook_number, record, use_cache, raw = task
+    stamp: Optional[Dict] = None
+    if raw is not None:
+        # Staged content rather than the file on disk: no mtime matches -1, so
+        # the next run hashes the working copy again.
+        if use_cache:
+            stamp = {"mtime_ns": -1, "size": len(raw), "sha256": hashlib.sha256(raw).hexdigest()}
+    elif use_cache:
+        st = file_path.stat()
+        raw = file_path.read_bytes()
+        stamp = cache_stamp(st, raw, record)
+    else:
+        raw = file_path.read_bytes()
+    if stamp is None or (record is not None and record["sha256"] != stamp["sha256"]):
+        record = None
+    fd = load_file_data(file_path, rel_path, is_runbook, runbook_number, raw, record)
+    if not fd.from_cache:
+        scan_file(fd)
+        scan_code_commands(fd)
+    return fd, stamp
+
+
+# Git fast path.
+#
+# For pre-commit runs git names the markdown files that changed, and the files
+# recorded in the scan cache by the previous run stand in for the directory
+# walk: only changed files are re-scanned and unchanged runbooks reuse their
+# cached cards. With --staged, the audit covers what is about to be
+# committed, so files that are staged or have unstaged edits are read from
+# the index rather than from disk.
+def run_git(root: Path, command: List[str], stdin: Optional[bytes] = None) -> bytes:
+    try:
+        proc = subprocess.run(["git", "-C", str(root), *command], input=stdin, capture_output=True, check=True)
+    except (OSError, subprocess.CalledProcessError) as exc:
+        detail = getattr(exc, "stderr", None) or str(exc).encode("utf-8")
+        raise SystemExit(f"git {command[0]} failed: {detail.decode('utf-8', 'replace').strip()}")
+    return proc.stdout
+
+
+def git_paths(root: Path, command: List[str]) -> Set[str]:
+    return {os.path.normpath(name) for name in run_git(root, command).decode("utf-8").split("\0") if name}
+
+
+def git_changed_paths(root: Path, rev: Optional[str] = None, staged: bool = False) -> Set[str]:
+    """rel_paths of markdown files under root changed since rev, or staged in the index."""
+    if staged:
+        return git_paths(root, ["diff", "--name-only", "--relative", "-z", "--cached", "--", "*.md"])
+    # New files are not in any diff until they are added.
+    return git_paths(root, ["diff", "--name-only", "--relative", "-z", rev, "--", "*.md"]) | git_paths(
+        root, ["ls-files", "--others", "--exclude-standard", "-z", "--", "*.md"]
+    )
+
+
+def git_index_contents(root: Path, staged: Set[str]) -> Dict[str, Optional[bytes]]:
+    """Index content of the staged files and of those with unstaged edits; None for files the commit drops.
+
+    Every other file is the same in the index and on disk.
+    """
+    unstaged = git_paths(root, ["diff", "--name-only", "--relative", "-z", "--", "*.md"])
+    rel_paths = sorted(staged | unstaged)
+    if not rel_paths:
+        return {}
+    # ":./path" names the index entry relative to root rather than to the top of the repository.
+    requests = "".join(f":./{Path(rel_path).as_posix()}\n" for rel_path in rel_paths).encode("utf-8")
+    out = run_git(root, ["cat-file", "--batch"], requests)
+    contents: Dict[str, Optional[bytes]] = {}
+    at = 0
+    for rel_path in rel_paths:
+        header_end = out.index(b"\n", at)
+        header = out[at:header_end].split()
+        if header[-1] == b"missing":
+            contents[rel_path] = None
+            at = header_end + 1
+            continue
+        size = int(header[2])
+        contents[rel_path] = out[header_end + 1 : header_end + 1 + size]
+        at = header_end + 1 + size + 1
+    return contents
+
+
+def known_paths(
+    cache: ScanCache,
+    changed: Set[str],
+    excludes: Sequence[str] = DEFAULT_EXCLUDES,
+    root: Optional[Path] = None,
+    output_root: Optional[Path] = None,
+    contents: Optional[Dict[str, Optional[bytes]]] = None,
+) -> List[PathInfo]:
+    """The previous run's files plus the changed ones, minus anything deleted.
+
+    With contents (from git_index_contents), a file counts as present when
+    the index has it, whether or not it is on disk.
+    """
+    root = root if root is not None else RUNBOOK_ROOT
+    output_root = output_root if output_root is not None else OUTPUT_ROOT
+    contents = contents or {}
+    excluded_names = set(excludes)
+    path_infos: List[PathInfo] = []
+    for rel_path in sorted(cache.records.keys() | changed):
+        kind = classify_markdown(os.path.basename(rel_path))
+        path = root / rel_path
+        if kind is None or excluded_names.intersection(Path(rel_path).parts[:-1]) or path.is_relative_to(output_root):
+            continue
+        if contents[rel_path] is not None if rel_path in contents else path.is_file():
+            path_infos.append((path, rel_path, *kind))
+    return path_infos
+
+
+def scan_files(
+    options: "AuditOptions",
+    cache: Optional[ScanCache] = None,
+    timer: Optional[StageTimer] = None,
+    paths: Optional[Sequence[Path]] = None,
+    changed: Optional[Set[str]] = None,
+    contents: Optional[Dict[str, Optional[bytes]]] = None,
+) -> List[FileData]:
+    """Discover and scan files, reusing cache records where the content is unchanged.
+
+    options supplies the tree (root, output_root, excludes, use_gitignore)
+    and the scan workers: options.pool when given (it is left running), else
+    a pool of options.jobs processes started for this call when jobs > 1.
+    With changed (rel_paths reported by git), the files of the previous run
+    stand in for discovery and those files are re-scanned regardless of their
+    cache records; without cache records this falls back to discovery.
+    contents maps rel_paths to the content to scan in place of the file on
+    disk, None for files to leave out (see git_index_contents).
+    """
+    timer = timer or StageTimer()
+    jobs, pool = options.jobs, options.pool
+    contents = contents or {}
+    with timer.stage("discovery"):
+        if changed is not None and cache is not None and cache.records:
+            path_infos = known_paths(cache, changed, options.excludes, options.root, options.output_root, contents)
+        elif paths is None:
+            path_infos = discover_paths(options.excludes, options.use_gitignore, options.root, output_root=options.output_root)
+        else:
+            path_infos = collect_paths(paths, options.excludes, options.use_gitignore, options.root, options.output_root)
+    if contents:
+        path_infos = [path_info for path_info in path_infos if contents.get(path_info[1], b"") is not None]
+    changed = changed or set()
+    tasks: List[ScanTask] = [
+        (
+            *path_info,
+            cache.records.get(path_info[1]) if cache is not None and path_info[1] not in changed else None,
+            cache is not None,
+            contents.get(path_info[1]),
+        )
+        for path_info in path_infos
+    ]
+    with timer.stage("scanning"):
+        if (pool is not None or jobs > 1) and len(tasks) > 1:
+            chunksize = max(1, len(tasks) // (max(jobs, 1) * 4))
+            with nullcontext(pool) if pool is not None else ProcessPoolExecutor(max_workers=jobs) as executor:
+                results = list(executor.map(read_and_scan, tasks, chunksize=chunksize))
+        else:
+            results = [read_and_scan(task) for task in tasks]
+
+    files: List[FileData] = []
+    for fd, stamp in results:
+        if cache is not None:
+            cache.update(fd, stamp)
+        files.append(fd)
+    sort_files(files)
+    return files
+
+
+# Entry store.
+#
+# IPC and risk detection match whole lines, so the same statement repeated
+# across runbooks produces many near-identical entries. The store groups them
+# by (kind, normalized name) so registries list each once with every source.
+ENTRY_NAME_TRIM = " -*+>#`|_"
+
+
+def normalize_entry_name(name: str) -> str:
+    return " ".join(name.split()).strip(ENTRY_NAME_TRIM).casefold()
+
+
+class EntryStore:
+    def __init__(self) -> None:
+        self.groups: Dict[Tuple[str, str], EntryGroup] = {}
+
+    def add(self, entry: DetectedEntry) -> None:
+        key = (entry.kind, sys.intern(normalize_entry_name(entry.name)))
+        group = self.groups.get(key)
+        if group is None:
+            self.groups[key] = EntryGroup(entry.kind, entry.name, [entry])
+        else:
+            group.occurrences.append(entry)
+
+
+def entry_groups(all_files: List[FileData], attrs: Sequence[str], grouped: bool = True) -> Iterator[EntryGroup]:
+    """Entries of the given FileData attributes in file order, grouped unless grouped=False.
+
+    Flat mode yields one single-occurrence group per entry, which renders
+    exactly like the historical per-entry output.
+    """
+    if not grouped:
+        for fd in all_files:
+            for attr in attrs:
+                for entry in getattr(fd, attr):
+                    yield EntryGroup(entry.kind, entry.name, [entry])
+        return
+    store = EntryStore()
+    for fd in all_files:
+        for attr in attrs:
+            for entry in getattr(fd, attr):
+                store.add(entry)
+    yield from store.groups.values()
+
+
+def get_section(fd: FileData, name: str) -> Tuple[Optional[str], Optional[int], Optional[int]]:
+    span = fd.sections.get(name)
+    if span is None:
+        return None, None, None
+    start, end = span
+    section_text = "\n".join(fd.lines[start - 1 : end]).strip()
+    return section_text if section_text else None, start, end
 
 
 def record_todo(todos: List[str], message: str, source: str) -> None:
@@ -205,13 +1063,13 @@ def build_runbook_card(fd: FileData, todos: List[str]) -> str:
         record_todo(todos, f"{label} missing", src)
         return "UNSPECIFIED\nTODO: Provide details ({})".format(src), False
 
-    purpose_text, ps, pe = get_section(fd, ["purpose"])
+    purpose_text, ps, pe = get_section(fd, "purpose")
     purpose_value, has_purpose = ensure_content(purpose_text, "Purpose", ps, pe)
 
-    produces_text, prs, pre = get_section(fd, ["produce", "artifact", "output"])
+    produces_text, prs, pre = get_section(fd, "produces")
     produces_value, has_produces = ensure_content(produces_text, "Produces (Artifacts)", prs, pre)
 
-    consumes_text, cs, ce = get_section(fd, ["consume", "prereq", "input"])
+    consumes_text, cs, ce = get_section(fd, "consumes")
     consumes_value, has_consumes = ensure_content(consumes_text, "Consumes (Prereqs)", cs, ce)
 
     card_lines: List[str] = []
@@ -258,7 +1116,7 @@ def build_runbook_card(fd: FileData, todos: List[str]) -> str:
 
     # Process lifecycle
     card_lines.append("- Process lifecycle (if any)")
-    lifecycle_section, ls, le = get_section(fd, ["process", "lifecycle", "startup", "shutdown"])
+    lifecycle_section, ls, le = get_section(fd, "lifecycle")
     if lifecycle_section:
         card_lines.append(f"  - {lifecycle_section.strip()}".replace("\n", " "))
     else:
@@ -327,7 +1185,7 @@ def worst_color(colors: List[str]) -> str:
     return COLOR_ORDER[idx]
 
 
-def compute_passes(fd: FileData) -> Dict[str, str]:
+def compute_passes(fd: FileData, graph: Optional["DependencyGraph"] = None) -> Dict[str, str]:
     has_verification = bool(fd.verifications)
     has_rest_or_ipc = bool(fd.rest or fd.ipc)
     has_schema = bool(fd.schemas)
@@ -355,9 +1213,10 @@ def compute_passes(fd: FileData) -> Dict[str, str]:
         passes["Pass 2"] = "YELLOW"
 
     # Pass 3: Dependency Closure
-    if not has_consumes:
+    closure = graph.closure.get(runbook_label(fd)) if graph is not None else None
+    if not has_consumes or closure == "cycle":
         passes["Pass 3"] = "RED"
-    elif not has_produces:
+    elif not has_produces or closure == "dangling":
         passes["Pass 3"] = "YELLOW"
     else:
         passes["Pass 3"] = "GREEN"
@@ -394,123 +1253,595 @@ def color_overall(passes: Dict[str, str]) -> str:
     return "UNSPECIFIED"
 
 
-def write_file(path: Path, content: str) -> None:
+def write_lines(path: Path, lines: Iterable[str], skip_digest: Optional[str] = None) -> Tuple[str, bool]:
+    """Stream lines to path via a temp file renamed into place.
+
+    The result is byte-identical to write_file(path, "\n".join(lines)), but only
+    trailing whitespace is ever held in memory, and an interrupted run leaves
+    the previous file untouched. Returns the sha256 of the content and whether
+    the file was replaced; when the digest equals skip_digest the temp file is
+    discarded instead.
+    """
     path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(content.rstrip() + "\n", encoding="utf-8")
+    tmp_path = path.with_name(path.name + ".tmp")
+    digest = hashlib.sha256()
+    try:
+        with tmp_path.open("w", encoding="utf-8") as out:
+            pending = ""
+            first = True
+            for line in lines:
+                chunk = pending + (line if first else "\n" + line)
+                first = False
+                kept = chunk.rstrip()
+                if kept:
+                    out.write(kept)
+                    digest.update(kept.encode("utf-8"))
+                    pending = chunk[len(kept) :]
+                else:
+                    pending = chunk
+            out.write("\n")
+            digest.update(b"\n")
+        hexdigest = digest.hexdigest()
+        if hexdigest == skip_digest:
+            tmp_path.unlink()
+            return hexdigest, False
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    return hexdigest, True
 
 
-def build_contract_registry(all_files: List[FileData], todos: List[str]) -> str:
-    lines: List[str] = []
-    lines.append("# Contract Registry")
+def write_file(path: Path, content: str) -> None:
+    write_lines(path, [content])
+
+
+class OutputSink(ABC):
+    """Receives outputs by name (a "/"-separated path under the output root).
+
+    Content is normalized like write_lines: trailing whitespace stripped and a
+    single final newline. A write whose content matches what the sink already
+    holds is skipped; changed/unchanged record what happened since the last
+    reset() and feed the output manifest.
+    """
+
+    def __init__(self) -> None:
+        self.changed: List[str] = []
+        self.unchanged: List[str] = []
+        self.removed: List[str] = []
+        self.bytes_written = 0
+
+    def reset(self) -> None:
+        self.changed = []
+        self.unchanged = []
+        self.removed = []
+        self.bytes_written = 0
+
+    @abstractmethod
+    def write_lines(self, name: str, lines: Iterable[str]) -> bool:
+        """Store the output; True when its content changed."""
+
+    @abstractmethod
+    def remove_stale(self, directory: str, keep: Set[str]) -> None:
+        """Drop outputs directly under directory whose names are not in keep."""
+
+    def write_file(self, name: str, content: str) -> bool:
+        return self.write_lines(name, [content])
+
+    def _track(self, name: str, changed: bool, size: int) -> bool:
+        if changed:
+            self.changed.append(name)
+            self.bytes_written += size
+        else:
+            self.unchanged.append(name)
+        return changed
+
+    def manifest(self) -> Dict[str, List[str]]:
+        return {"changed": list(self.changed), "unchanged": list(self.unchanged), "removed": list(self.removed)}
+
+
+class OutputWriter(OutputSink):
+    """Writes outputs under root, skipping any whose content hash matches the file there.
+
+    The first write to a name compares against the file on disk; later writes
+    compare against the digest of the previous write.
+    """
+
+    def __init__(self, root: Optional[Path] = None) -> None:
+        super().__init__()
+        self.root = root if root is not None else OUTPUT_ROOT
+        self.digests: Dict[str, str] = {}
+
+    def path(self, name: str) -> Path:
+        return self.root / name
+
+    def known_digest(self, name: str) -> Optional[str]:
+        if name not in self.digests:
+            try:
+                with self.path(name).open("rb") as existing:
+                    self.digests[name] = hashlib.file_digest(existing, "sha256").hexdigest()
+            except FileNotFoundError:
+                return None
+        return self.digests[name]
+
+    def write_lines(self, name: str, lines: Iterable[str]) -> bool:
+        path = self.path(name)
+        digest, changed = write_lines(path, lines, self.known_digest(name))
+        self.digests[name] = digest
+        return self._track(name, changed, path.stat().st_size if changed else 0)
+
+    def remove_stale(self, directory: str, keep: Set[str]) -> None:
+        folder = self.path(directory)
+        if not folder.is_dir():
+            return
+        for path in sorted(folder.glob("*.md")):
+            name = f"{directory}/{path.name}"
+            if name not in keep:
+                path.unlink()
+                self.digests.pop(name, None)
+                self.removed.append(name)
+        if not any(folder.iterdir()):
+            folder.rmdir()
+
+
+class MemorySink(OutputSink):
+    """Keeps outputs in memory as {name: content}; nothing touches the disk."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.outputs: Dict[str, str] = {}
+
+    def write_lines(self, name: str, lines: Iterable[str]) -> bool:
+        content = "\n".join(lines).rstrip() + "\n"
+        changed = self.outputs.get(name) != content
+        self.outputs[name] = content
+        return self._track(name, changed, len(content.encode("utf-8")))
+
+    def remove_stale(self, directory: str, keep: Set[str]) -> None:
+        prefix = directory + "/"
+        for name in sorted(self.outputs):
+            if name.startswith(prefix) and "/" not in name[len(prefix) :] and name not in keep:
+                del self.outputs[name]
+                self.removed.append(name)
+
+
+# Interface linking.
+#
+# Hash indexes keyed by (kind, normalized name) join the runbooks that define
+# an interface, i.e. mention it in their Produces or Purpose section, with the
+# other runbooks that mention it: one pass over the entries, then one lookup
+# per registry row.
+LINK_FIELDS = ("rest", "ipc", "files")
+PRODUCER_SECTIONS = ("produces", "purpose")
+REST_PARAM_PATTERN = re.compile(r"\{[^/}]*\}|:[A-Za-z_]\w*")
+LINK_DISPLAY_LIMIT = 5
+
+
+def link_key(entry: DetectedEntry) -> Tuple[str, str]:
+    name = normalize_entry_name(entry.name)
+    if entry.kind == "REST":
+        # GET /cases/{id}, /cases/:caseId and /cases/{caseId}/ are one endpoint
+        name = REST_PARAM_PATTERN.sub("{}", name).rstrip("/")
+    return entry.kind, name
+
+
+def runbook_label(fd: FileData) -> str:
+    return f"Runbook {fd.runbook_number}" if fd.runbook_number is not None else fd.rel_path
+
+
+class InterfaceLinks:
+    def __init__(self) -> None:
+        # Values are insertion-ordered label sets
+        self.producers: Dict[Tuple[str, str], Dict[str, None]] = {}
+        self.consumers: Dict[Tuple[str, str], Dict[str, None]] = {}
+
+    def ends(self, entry: DetectedEntry) -> Tuple[List[str], List[str]]:
+        """(producers, consumers) of the interface entry names."""
+        key = link_key(entry)
+        producers = self.producers.get(key, {})
+        consumers = [label for label in self.consumers.get(key, ()) if label not in producers]
+        return list(producers), consumers
+
+
+def link_interfaces(files: List[FileData]) -> InterfaceLinks:
+    links = InterfaceLinks()
+    for fd in files:
+        if not fd.is_runbook:
+            continue
+        label = runbook_label(fd)
+        spans = [fd.sections[name] for name in PRODUCER_SECTIONS if name in fd.sections]
+        for attr in LINK_FIELDS:
+            for entry in getattr(fd, attr):
+                produced = any(start <= entry.line_start <= end for start, end in spans)
+                index = links.producers if produced else links.consumers
+                index.setdefault(link_key(entry), {})[label] = None
+    return links
+
+
+def format_ends(labels: List[str]) -> str:
+    if not labels:
+        return "UNSPECIFIED"
+    shown = ", ".join(labels[:LINK_DISPLAY_LIMIT])
+    if len(labels) > LINK_DISPLAY_LIMIT:
+        shown += f" (+{len(labels) - LINK_DISPLAY_LIMIT} more)"
+    return shown
+
+
+# Runbook dependency graph.
+#
+# Nodes are runbooks; every file sharing a runbook number is one node. A
+# runbook depends on the runbooks its Consumes section names ("Runbook 3",
+# "Runbooks 1-9") and on the producers of the artifacts it consumes: code
+# spans and interface entries that another runbook lists under Produces.
+# update() re-derives only the runbooks that changed and re-checks the
+# closure of just those and the runbooks downstream of them.
+RUNBOOK_REF_PATTERN = re.compile(r"\bRunbooks?\s+(\d+)(?:\s*[-\u2013]\s*(\d+))?", re.IGNORECASE)
+CODE_SPAN_PATTERN = re.compile(r"`([^`\n]+)`")
+
+Artifact = Tuple[str, str]  # (kind, normalized name); code spans are kind "Artifact"
+
+
+def section_artifacts(fd: FileData, section: str) -> Dict[Artifact, None]:
+    span = fd.sections.get(section)
+    if span is None:
+        return {}
+    start, end = span
+    artifacts: Dict[Artifact, None] = {}
+    for line in fd.lines[start - 1 : end]:
+        for m in CODE_SPAN_PATTERN.finditer(line):
+            artifacts[("Artifact", normalize_entry_name(m.group(1)))] = None
+    for attr in LINK_FIELDS:
+        for entry in getattr(fd, attr):
+            if start <= entry.line_start <= end:
+                artifacts[link_key(entry)] = None
+    return artifacts
+
+
+def section_runbook_refs(fd: FileData, section: str) -> Dict[str, None]:
+    span = fd.sections.get(section)
+    if span is None:
+        return {}
+    refs: Dict[str, None] = {}
+    for line in fd.lines[span[0] - 1 : span[1]]:
+        for m in RUNBOOK_REF_PATTERN.finditer(line):
+            first = int(m.group(1))
+            last = int(m.group(2)) if m.group(2) else first
+            for number in range(first, min(last, first + 100) + 1):
+                refs[f"Runbook {number}"] = None
+    return refs
+
+
+class DependencyGraph:
+    """Runbook -> runbooks it depends on, with build order, cycles and closure checks.
+
+    closure maps each runbook to "ok", "dangling" (something in its closure
+    names a runbook that does not exist) or "cycle" (its closure contains a
+    cycle); Pass 3 reads it.
+    """
+
+    def __init__(self) -> None:
+        self.files: Dict[str, List[FileData]] = {}
+        self.produced: Dict[str, Dict[Artifact, None]] = {}
+        self.consumed: Dict[str, Dict[Artifact, None]] = {}
+        self.refs: Dict[str, Dict[str, None]] = {}
+        self.producers: Dict[Artifact, Dict[str, None]] = {}
+        self.deps: Dict[str, Dict[str, str]] = {}  # node -> dependency -> reason
+        self.missing: Dict[str, List[str]] = {}  # node -> referenced runbooks that do not exist
+        self.order: List[str] = []
+        self.cycles: List[List[str]] = []
+        self.closure: Dict[str, str] = {}
+        self.recomputed: Set[str] = set()  # nodes whose closure the last update re-checked
+
+    def sort_key(self, node: str) -> Tuple[int, str]:
+        number = self.files[node][0].runbook_number if node in self.files else None
+        return (number if number is not None else 1 << 30, node)
+
+    def update(self, files: List[FileData], changed: Optional[Iterable[str]] = None) -> None:
+        """Refresh from files; changed lists the runbook labels whose files changed (default: all)."""
+        grouped: Dict[str, List[FileData]] = {}
+        for fd in files:
+            if fd.is_runbook:
+                grouped.setdefault(runbook_label(fd), []).append(fd)
+        dirty = set(grouped) | set(self.files) if changed is None else set(changed)
+        self.files = grouped
+
+        # Re-derive the changed nodes and keep the producer index in step.
+        relink: Set[str] = set()
+        # What changed nodes produced before as well as after: consumers of
+        # an artifact a node stopped producing lose that edge.
+        changed_artifacts: Set[Artifact] = set()
+        for node in dirty:
+            for artifact in self.produced.pop(node, {}):
+                changed_artifacts.add(artifact)
+                owners = self.producers.get(artifact, {})
+                owners.pop(node, None)
+                if not owners:
+                    self.producers.pop(artifact, None)
+            self.consumed.pop(node, None)
+            self.refs.pop(node, None)
+            for fd in grouped.get(node, []):
+                self.produced.setdefault(node, {}).update(section_artifacts(fd, "produces"))
+                self.consumed.setdefault(node, {}).update(section_artifacts(fd, "consumes"))
+                self.refs.setdefault(node, {}).update(section_runbook_refs(fd, "consumes"))
+            for artifact in self.produced.get(node, {}):
+                self.producers.setdefault(artifact, {})[node] = None
+        # Consumers of anything a changed node produces or produced may gain or
+        # lose an edge, and so may nodes naming a changed (perhaps new) runbook.
+        changed_artifacts.update(a for node in dirty for a in self.produced.get(node, {}))
+        for node, consumed in self.consumed.items():
+            if node in dirty or not changed_artifacts.isdisjoint(consumed) or not dirty.isdisjoint(self.refs.get(node, {})):
+                relink.add(node)
+        relink |= dirty
+        for node in relink:
+            self.deps.pop(node, None)
+            self.missing.pop(node, None)
+            if node not in grouped:
+                continue
+            deps: Dict[str, str] = {}
+            for ref in self.refs.get(node, {}):
+                if ref == node:
+                    continue
+                if ref in grouped:
+                    deps[ref] = "named in Consumes"
+                else:
+                    self.missing.setdefault(node, []).append(ref)
+            for artifact in self.consumed.get(node, {}):
+                for producer in self.producers.get(artifact, {}):
+                    if producer != node and producer not in deps:
+                        deps[producer] = f"consumes `{artifact[1]}`"
+            self.deps[node] = deps
+        # Dependency lists may still name runbooks that were removed.
+        for node, deps in self.deps.items():
+            for dep in [d for d in deps if d not in grouped]:
+                del deps[dep]
+                relink.add(node)
+
+        self._order()
+        # Re-check the closure of the relinked nodes and everything downstream.
+        dependents: Dict[str, List[str]] = {}
+        for node, deps in self.deps.items():
+            for dep in deps:
+                dependents.setdefault(dep, []).append(node)
+        stale = set(relink) & set(grouped)
+        queue = list(stale)
+        while queue:
+            for node in dependents.get(queue.pop(), []):
+                if node not in stale:
+                    stale.add(node)
+                    queue.append(node)
+        for node in [n for n in self.closure if n not in grouped]:
+            del self.closure[node]
+        for node in self.order:
+            if node in stale:
+                dep_states = [self.closure[dep] for dep in self.deps.get(node, {})]
+                if "cycle" in dep_states:
+                    self.closure[node] = "cycle"
+                elif self.missing.get(node) or "dangling" in dep_states:
+                    self.closure[node] = "dangling"
+                else:
+                    self.closure[node] = "ok"
+        for node in stale:
+            if node not in self.order:
+                # On a cycle or downstream of one; Kahn's algorithm never reaches it.
+                self.closure[node] = "cycle"
+        self.recomputed = stale
+
+    def _order(self) -> None:
+        """Kahn's algorithm for the build order, Tarjan's for the cycles."""
+        nodes = sorted(self.files, key=self.sort_key)
+        indegree = {node: len(self.deps.get(node, {})) for node in nodes}
+        dependents: Dict[str, List[str]] = {node: [] for node in nodes}
+        for node in nodes:
+            for dep in self.deps.get(node, {}):
+                dependents[dep].append(node)
+        ready = [(self.sort_key(node), node) for node in nodes if indegree[node] == 0]
+        heapq.heapify(ready)
+        order: List[str] = []
+        while ready:
+            _, node = heapq.heappop(ready)
+            order.append(node)
+            for dependent in dependents[node]:
+                indegree[dependent] -= 1
+                if indegree[dependent] == 0:
+                    heapq.heappush(ready, (self.sort_key(dependent), dependent))
+        self.order = order
+
+        self.cycles = []
+        if len(order) == len(nodes):
+            return
+        index: Dict[str, int] = {}
+        low: Dict[str, int] = {}
+        stack: List[str] = []
+        on_stack: Set[str] = set()
+        for root in nodes:
+            if root in index:
+                continue
+            work = [(root, iter(sorted(self.deps.get(root, {}), key=self.sort_key)))]
+            index[root] = low[root] = len(index)
+            stack.append(root)
+            on_stack.add(root)
+            while work:
+                node, children = work[-1]
+                child = next(children, None)
+                if child is not None:
+                    if child not in index:
+                        index[child] = low[child] = len(index)
+                        stack.append(child)
+                        on_stack.add(child)
+                        work.append((child, iter(sorted(self.deps.get(child, {}), key=self.sort_key))))
+                    elif child in on_stack:
+                        low[node] = min(low[node], index[child])
+                    continue
+                work.pop()
+                if work:
+                    low[work[-1][0]] = min(low[work[-1][0]], low[node])
+                if low[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    if len(component) > 1:
+                        self.cycles.append(sorted(component, key=self.sort_key))
+        self.cycles.sort(key=lambda cycle: self.sort_key(cycle[0]))
+
+
+def build_dependency_report(graph: DependencyGraph) -> str:
+    lines: List[str] = ["# Runbook Dependency Graph", "", "## Build Order"]
+    if graph.order:
+        lines.extend(f"{idx}. {node}" for idx, node in enumerate(graph.order, 1))
+    else:
+        lines.append("None found.")
+    blocked = [node for node in sorted(graph.files, key=graph.sort_key) if node not in graph.order]
+    if blocked:
+        lines.append("")
+        lines.append(f"Not orderable (on or behind a cycle): {', '.join(blocked)}")
     lines.append("")
-    lines.append("## REST Contracts")
-    if any(fd.rest for fd in all_files):
-        for fd in all_files:
-            for entry in fd.rest:
-                lines.append(f"- {entry.name}")
-                lines.append(f"  - Request schema: UNSPECIFIED (TODO {entry.source})")
-                lines.append(f"  - Response schema: UNSPECIFIED (TODO {entry.source})")
-                lines.append(f"  - Error shape: UNSPECIFIED (TODO {entry.source})")
-                lines.append(f"  - Owner: UNSPECIFIED (TODO {entry.source})")
-                lines.append(f"  - Source: {entry.source} \"{entry.snippet}\"")
-                record_todo(todos, f"Contract details missing for {entry.name}", entry.source)
+    lines.append("## Dependencies")
+    any_deps = False
+    for node in sorted(graph.files, key=graph.sort_key):
+        deps = graph.deps.get(node, {})
+        if deps:
+            any_deps = True
+            lines.append(f"- {node} <- " + "; ".join(f"{dep} ({reason})" for dep, reason in sorted(deps.items(), key=lambda d: graph.sort_key(d[0]))))
+    if not any_deps:
+        lines.append("None found.")
+    lines.append("")
+    lines.append("## Cycles")
+    if graph.cycles:
+        lines.extend("- " + ", ".join(cycle) for cycle in graph.cycles)
     else:
         lines.append("None found.")
-
     lines.append("")
-    lines.append("## IPC Contracts")
-    if any(fd.ipc for fd in all_files):
-        for fd in all_files:
-            for entry in fd.ipc:
-                lines.append(f"- {entry.name}")
-                lines.append(f"  - Payload schema: UNSPECIFIED (TODO {entry.source})")
-                lines.append(f"  - Direction: UNSPECIFIED (TODO {entry.source})")
-                lines.append(f"  - Owner: UNSPECIFIED (TODO {entry.source})")
-                lines.append(f"  - Source: {entry.source} \"{entry.snippet}\"")
-                record_todo(todos, f"IPC contract incomplete for {entry.name}", entry.source)
+    lines.append("## Unresolved Runbook References")
+    missing = [(node, refs) for node, refs in sorted(graph.missing.items(), key=lambda m: graph.sort_key(m[0])) if refs]
+    if missing:
+        lines.extend(f"- {node}: {', '.join(refs)} not found" for node, refs in missing)
     else:
         lines.append("None found.")
+    return "\n".join(lines)
 
-    lines.append("")
-    lines.append("## Schema Contracts")
+
+def build_contract_registry(all_files: List[FileData], todos: List[str], grouped: bool = True, title: str = "Contract Registry", links: Optional[InterfaceLinks] = None) -> Iterator[str]:
+    links = links or link_interfaces(all_files)
+
+    def owner(entry: DetectedEntry) -> str:
+        producers = links.ends(entry)[0]
+        return format_ends(producers) if producers else f"UNSPECIFIED (TODO {entry.source})"
+
+    yield f"# {title}"
+    yield ""
+    yield "## REST Contracts"
+    if any(fd.rest for fd in all_files):
+        for group in entry_groups(all_files, ["rest"], grouped):
+            entry = group.first
+            yield f"- {entry.name}"
+            yield f"  - Request schema: UNSPECIFIED (TODO {entry.source})"
+            yield f"  - Response schema: UNSPECIFIED (TODO {entry.source})"
+            yield f"  - Error shape: UNSPECIFIED (TODO {entry.source})"
+            yield f"  - Owner: {owner(entry)}"
+            yield f"  - Source: {entry.source} \"{entry.snippet}\""
+            if len(group.occurrences) > 1:
+                yield f"  - Also at: {group.other_sources()}"
+            record_todo(todos, f"Contract details missing for {entry.name}", entry.source)
+    else:
+        yield "None found."
+
+    yield ""
+    yield "## IPC Contracts"
+    if any(fd.ipc for fd in all_files):
+        for group in entry_groups(all_files, ["ipc"], grouped):
+            entry = group.first
+            yield f"- {entry.name}"
+            yield f"  - Payload schema: UNSPECIFIED (TODO {entry.source})"
+            yield f"  - Direction: UNSPECIFIED (TODO {entry.source})"
+            yield f"  - Owner: {owner(entry)}"
+            yield f"  - Source: {entry.source} \"{entry.snippet}\""
+            if len(group.occurrences) > 1:
+                yield f"  - Also at: {group.other_sources()}"
+            record_todo(todos, f"IPC contract incomplete for {entry.name}", entry.source)
+    else:
+        yield "None found."
+
+    yield ""
+    yield "## Schema Contracts"
     if any(fd.schemas for fd in all_files):
-        for fd in all_files:
-            for entry in fd.schemas:
-                lines.append(f"- {entry.name}")
-                lines.append(f"  - Fields: UNSPECIFIED (TODO {entry.source})")
-                lines.append(f"  - Owner: UNSPECIFIED (TODO {entry.source})")
-                lines.append(f"  - Source: {entry.source} \"{entry.snippet}\"")
-                record_todo(todos, f"Schema fields unspecified for {entry.name}", entry.source)
+        for group in entry_groups(all_files, ["schemas"], grouped):
+            entry = group.first
+            yield f"- {entry.name}"
+            yield f"  - Fields: UNSPECIFIED (TODO {entry.source})"
+            yield f"  - Owner: UNSPECIFIED (TODO {entry.source})"
+            yield f"  - Source: {entry.source} \"{entry.snippet}\""
+            if len(group.occurrences) > 1:
+                yield f"  - Also at: {group.other_sources()}"
+            record_todo(todos, f"Schema fields unspecified for {entry.name}", entry.source)
     else:
-        lines.append("None found.")
+        yield "None found."
 
-    lines.append("")
-    lines.append("## File Contracts")
+    yield ""
+    yield "## File Contracts"
     if any(fd.files for fd in all_files):
-        for fd in all_files:
-            for entry in fd.files:
-                lines.append(f"- {entry.name}")
-                lines.append(f"  - Directory/naming rules: UNSPECIFIED (TODO {entry.source})")
-                lines.append(f"  - Owner: UNSPECIFIED (TODO {entry.source})")
-                lines.append(f"  - Source: {entry.source} \"{entry.snippet}\"")
-                record_todo(todos, f"File contract details unspecified for {entry.name}", entry.source)
+        for group in entry_groups(all_files, ["files"], grouped):
+            entry = group.first
+            yield f"- {entry.name}"
+            yield f"  - Directory/naming rules: UNSPECIFIED (TODO {entry.source})"
+            yield f"  - Owner: {owner(entry)}"
+            yield f"  - Source: {entry.source} \"{entry.snippet}\""
+            if len(group.occurrences) > 1:
+                yield f"  - Also at: {group.other_sources()}"
+            record_todo(todos, f"File contract details unspecified for {entry.name}", entry.source)
     else:
-        lines.append("None found.")
+        yield "None found."
 
-    return "\n".join(lines)
 
+ATLAS_TYPES = {"REST": "REST", "IPC": "IPC", "File": "FS"}
+ATLAS_TODO_LABELS = {"REST": "", "IPC": "IPC ", "File": "file contract "}
 
-def build_interface_atlas(all_files: List[FileData], todos: List[str]) -> str:
-    lines: List[str] = []
-    lines.append("# Interface Atlas")
-    lines.append("")
-    lines.append("| From | To | Interface Type (REST/IPC/FS/ProcessIO) | Contract Name | Owner | Validator | Source |")
-    lines.append("| --- | --- | --- | --- | --- | --- | --- |")
+
+def build_interface_atlas(all_files: List[FileData], todos: List[str], grouped: bool = True, title: str = "Interface Atlas", links: Optional[InterfaceLinks] = None) -> Iterator[str]:
+    links = links or link_interfaces(all_files)
+    yield f"# {title}"
+    yield ""
+    yield "| From | To | Interface Type (REST/IPC/FS/ProcessIO) | Contract Name | Owner | Validator | Source |"
+    yield "| --- | --- | --- | --- | --- | --- | --- |"
     any_rows = False
-    for fd in all_files:
-        for entry in fd.rest:
-            any_rows = True
-            record_todo(todos, f"Owner/Validator unspecified for {entry.name}", entry.source)
-            lines.append(
-                f"| UNSPECIFIED | UNSPECIFIED | REST | {entry.name} | UNSPECIFIED | UNSPECIFIED | {entry.source} |"
-            )
-        for entry in fd.ipc:
-            any_rows = True
-            record_todo(todos, f"Owner/Validator unspecified for IPC {entry.name}", entry.source)
-            lines.append(
-                f"| UNSPECIFIED | UNSPECIFIED | IPC | {entry.name} | UNSPECIFIED | UNSPECIFIED | {entry.source} |"
-            )
-        for entry in fd.files:
-            any_rows = True
-            record_todo(todos, f"Owner/Validator unspecified for file contract {entry.name}", entry.source)
-            lines.append(
-                f"| UNSPECIFIED | UNSPECIFIED | FS | {entry.name} | UNSPECIFIED | UNSPECIFIED | {entry.source} |"
-            )
+    for group in entry_groups(all_files, ["rest", "ipc", "files"], grouped):
+        any_rows = True
+        entry = group.first
+        producers, consumers = links.ends(entry)
+        missing = "Validator" if producers else "Owner/Validator"
+        record_todo(todos, f"{missing} unspecified for {ATLAS_TODO_LABELS[entry.kind]}{entry.name}", entry.source)
+        source = entry.source
+        if len(group.occurrences) > 1:
+            source += f" (+{len(group.occurrences) - 1} more)"
+        producer_cell = format_ends(producers)
+        yield (
+            f"| {producer_cell} | {format_ends(consumers)} | {ATLAS_TYPES[entry.kind]} | {entry.name} | {producer_cell} | UNSPECIFIED | {source} |"
+        )
     if not any_rows:
-        lines.append("| None | None | None | None | None | None | None |")
-    return "\n".join(lines)
+        yield "| None | None | None | None | None | None | None |"
 
 
-def build_invariant_catalog(all_files: List[FileData]) -> Tuple[str, List[DetectedEntry]]:
-    lines: List[str] = []
-    invariants: List[DetectedEntry] = []
-    for fd in all_files:
-        invariants.extend(fd.invariants)
-    lines.append("# Invariant Catalog")
-    lines.append("")
-    if invariants:
-        for idx, inv in enumerate(invariants, 1):
+def build_invariant_catalog(all_files: List[FileData], grouped: bool = True) -> Iterator[str]:
+    yield "# Invariant Catalog"
+    yield ""
+    if any(fd.invariants for fd in all_files):
+        for idx, group in enumerate(entry_groups(all_files, ["invariants"], grouped), 1):
+            inv = group.first
             inv_id = f"INV-{idx:03d}"
-            lines.append(f"{inv_id}")
-            lines.append(f"- Statement: {inv.name}")
-            lines.append(f"- Applies To: {inv.file}")
-            lines.append(f"- Enforcement point: UNSPECIFIED")
-            lines.append(f"- Proof/Test: UNSPECIFIED")
-            lines.append(f"- Source: {inv.source} \"{inv.snippet}\"")
-            lines.append("")
+            yield f"{inv_id}"
+            yield f"- Statement: {inv.name}"
+            yield f"- Applies To: {', '.join(group.files)}"
+            yield f"- Enforcement point: UNSPECIFIED"
+            yield f"- Proof/Test: UNSPECIFIED"
+            yield f"- Source: {inv.source} \"{inv.snippet}\""
+            if len(group.occurrences) > 1:
+                yield f"- Also at: {group.other_sources()}"
+            yield ""
     else:
-        lines.append("None found.")
-    return "\n".join(lines).rstrip(), invariants
+        yield "None found."
 
 
 def build_verification_gate_index(runbook_files: List[FileData], todos: List[str]) -> Tuple[str, List[str]]:
@@ -522,7 +1853,8 @@ def build_verification_gate_index(runbook_files: List[FileData], todos: List[str
         lines.append(f"## {fd.rel_path}")
         if fd.verifications:
             for entry in fd.verifications:
-                lines.append(f"- Command: {entry.name}")
+                command = f"`{entry.name}`" if "command" in entry.details else entry.name
+                lines.append(f"- Command: {command}")
                 lines.append(f"  - Expected outcome: UNSPECIFIED (TODO {entry.source})")
                 record_todo(todos, f"Expected outcome unspecified for {entry.name}", entry.source)
         else:
@@ -534,28 +1866,26 @@ def build_verification_gate_index(runbook_files: List[FileData], todos: List[str
     return "\n".join(lines).rstrip(), missing_gates
 
 
-def build_risk_register(all_files: List[FileData]) -> Tuple[str, List[DetectedEntry]]:
-    lines: List[str] = []
-    risks: List[DetectedEntry] = []
-    for fd in all_files:
-        risks.extend(fd.risks)
-    lines.append("# Risk Register")
-    lines.append("")
-    if risks:
-        for idx, risk in enumerate(risks, 1):
+def build_risk_register(all_files: List[FileData], grouped: bool = True) -> Iterator[str]:
+    yield "# Risk Register"
+    yield ""
+    if any(fd.risks for fd in all_files):
+        for idx, group in enumerate(entry_groups(all_files, ["risks"], grouped), 1):
+            risk = group.first
             risk_id = f"R-{idx:03d}"
-            lines.append(f"{risk_id}")
-            lines.append(f"- Description: {risk.name}")
-            lines.append(f"- Trigger / failure mode: UNSPECIFIED")
-            lines.append(f"- Impact: UNSPECIFIED")
-            lines.append(f"- Mitigation: UNSPECIFIED")
-            lines.append(f"- Verification: UNSPECIFIED")
-            lines.append(f"- Runbooks impacted: {risk.file}")
-            lines.append(f"- Source: {risk.source} \"{risk.snippet}\"")
-            lines.append("")
+            yield f"{risk_id}"
+            yield f"- Description: {risk.name}"
+            yield f"- Trigger / failure mode: UNSPECIFIED"
+            yield f"- Impact: UNSPECIFIED"
+            yield f"- Mitigation: UNSPECIFIED"
+            yield f"- Verification: UNSPECIFIED"
+            yield f"- Runbooks impacted: {', '.join(group.files)}"
+            yield f"- Source: {risk.source} \"{risk.snippet}\""
+            if len(group.occurrences) > 1:
+                yield f"- Also at: {group.other_sources()}"
+            yield ""
     else:
-        lines.append("None found.")
-    return "\n".join(lines).rstrip(), risks
+        yield "None found."
 
 
 def build_ryg_report(runbook_files: List[FileData], passes_by_file: Dict[str, Dict[str, str]], missing_contracts: List[str], missing_gates: List[str], risks: List[DetectedEntry]) -> str:
@@ -614,9 +1944,9 @@ def build_ryg_report(runbook_files: List[FileData], passes_by_file: Dict[str, Di
     return "\n".join(lines)
 
 
-def build_open_todos(todos: List[str]) -> str:
+def build_open_todos(todos: List[str], title: str = "Open TODOs") -> str:
     lines: List[str] = []
-    lines.append("# Open TODOs")
+    lines.append(f"# {title}")
     lines.append("")
     if todos:
         unique = []
@@ -632,7 +1962,73 @@ def build_open_todos(todos: List[str]) -> str:
     return "\n".join(lines)
 
 
-def build_audit_summary_json(runbook_files: List[FileData], passes_by_file: Dict[str, Dict[str, str]], blocking_fixes: List[str], missing_contracts: List[str], missing_gates: List[str], risks: List[DetectedEntry], todos: List[str]) -> str:
+# Sharded registries.
+#
+# One shard per source file under registries/contracts/, registries/interfaces/
+# and reports/todos/, behind a small index page at the usual output path. An
+# incremental run rewrites just the shards whose content changed (their own
+# file, or a linked interface elsewhere); shards of files that went away are
+# removed.
+SHARD_DIRS = ("registries/contracts", "registries/interfaces", "reports/todos")
+SHARD_NAME_PATTERN = re.compile(r"[^A-Za-z0-9._-]+")
+TODO_SOURCE_PATTERN = re.compile(r"\(([^()]+?):L\d+-L\d+\)$")
+
+
+def shard_name(rel_path: str) -> str:
+    return SHARD_NAME_PATTERN.sub("_", Path(rel_path).as_posix().replace("/", "__"))
+
+
+def build_shard_index(title: str, columns: List[str], rows: List[Tuple[str, List[int], str]]) -> str:
+    lines = [f"# {title}", ""]
+    if not rows:
+        lines.append("None found.")
+        return "\n".join(lines)
+    lines.append(f"{len(rows)} shard(s), one per source file.")
+    lines.append("")
+    lines.append("| Source | " + " | ".join(columns) + " | Shard |")
+    lines.append("| --- | " + " | ".join("---" for _ in columns) + " | --- |")
+    for source, counts, link in rows:
+        lines.append(f"| {source} | " + " | ".join(str(c) for c in counts) + f" | [{Path(link).name}]({link}) |")
+    return "\n".join(lines)
+
+
+def write_sharded_registries(files: List[FileData], writer: OutputSink, todos: List[str], grouped: bool = True, links: Optional[InterfaceLinks] = None) -> None:
+    links = links or link_interfaces(files)
+    contract_rows: List[Tuple[str, List[int], str]] = []
+    interface_rows: List[Tuple[str, List[int], str]] = []
+    for fd in files:
+        name = shard_name(fd.rel_path)
+        if fd.rest or fd.ipc or fd.schemas or fd.files:
+            link = f"contracts/{name}"
+            writer.write_lines(f"registries/{link}", build_contract_registry([fd], todos, grouped, f"Contract Registry: {fd.rel_path}", links))
+            contract_rows.append((fd.rel_path, [len(fd.rest), len(fd.ipc), len(fd.schemas), len(fd.files)], link))
+        if fd.rest or fd.ipc or fd.files:
+            link = f"interfaces/{name}"
+            writer.write_lines(f"registries/{link}", build_interface_atlas([fd], todos, grouped, f"Interface Atlas: {fd.rel_path}", links))
+            interface_rows.append((fd.rel_path, [len(fd.rest), len(fd.ipc), len(fd.files)], link))
+    writer.write_file("registries/CONTRACT_REGISTRY.md", build_shard_index("Contract Registry", ["REST", "IPC", "Schema", "File"], contract_rows))
+    writer.write_file("registries/INTERFACE_ATLAS.md", build_shard_index("Interface Atlas", ["REST", "IPC", "FS"], interface_rows))
+    writer.remove_stale("registries/contracts", {f"registries/{link}" for _, _, link in contract_rows})
+    writer.remove_stale("registries/interfaces", {f"registries/{link}" for _, _, link in interface_rows})
+
+
+def write_sharded_todos(todos: List[str], writer: OutputSink) -> None:
+    by_source: Dict[str, List[str]] = {}
+    for todo in todos:
+        m = TODO_SOURCE_PATTERN.search(todo)
+        by_source.setdefault(m.group(1) if m else "(no source)", []).append(todo)
+    rows: List[Tuple[str, List[int], str]] = []
+    for source, source_todos in by_source.items():
+        link = f"todos/{shard_name(source)}"
+        if not link.endswith(".md"):
+            link += ".md"
+        writer.write_file(f"reports/{link}", build_open_todos(source_todos, f"Open TODOs: {source}"))
+        rows.append((source, [len(dict.fromkeys(source_todos))], link))
+    writer.write_file("reports/OPEN_TODOS.md", build_shard_index("Open TODOs", ["TODOs"], rows))
+    writer.remove_stale("reports/todos", {f"reports/{link}" for _, _, link in rows})
+
+
+def build_audit_summary(runbook_files: List[FileData], passes_by_file: Dict[str, Dict[str, str]], blocking_fixes: List[str], missing_contracts: List[str], missing_gates: List[str], risks: List[DetectedEntry], todos: List[str], metrics: Optional[Dict] = None, graph: Optional[DependencyGraph] = None) -> Dict:
     runbooks_summary = []
     for fd in runbook_files:
         runbooks_summary.append(
@@ -662,63 +2058,1001 @@ def build_audit_summary_json(runbook_files: List[FileData], passes_by_file: Dict
             }
             for idx, r in enumerate(risks[:10])
         ],
+        # Every risk, not just the top ten, so --diff sees risks anywhere in the register.
+        "risk_keys": [f"{r.name} ({r.source})" for r in risks],
         "todos": todos,
     }
-    return json.dumps(data, indent=2)
+    if graph is not None:
+        data["build_order"] = graph.order
+        data["dependency_cycles"] = graph.cycles
+    if metrics is not None:
+        data["metrics"] = metrics
+    return data
+
+
+# Audit delta.
+#
+# Compares two audit_summary.json payloads with set operations on hashed keys.
+# Keys drop the ":Lx-Ly" spans so items that merely moved are not reported.
+DELTA_LINE_SPAN = re.compile(r":L\d+(?:-L\d+)?(?=\))")
+
+
+def load_summary(path: Path) -> Dict:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError) as exc:
+        raise SystemExit(f"Cannot read previous summary {path}: {exc}")
+
+
+def set_delta(previous: Iterable[str], current: Iterable[str]) -> Dict[str, List[str]]:
+    old = {DELTA_LINE_SPAN.sub("", item): item for item in previous}
+    new = {DELTA_LINE_SPAN.sub("", item): item for item in current}
+    return {
+        "added": [item for key, item in new.items() if key not in old],
+        "removed": [item for key, item in old.items() if key not in new],
+    }
 
 
-def main() -> None:
-    ensure_dirs()
-    files = discover_files()
-    for fd in files:
-        scan_file(fd)
+def risk_keys(summary: Dict) -> List[str]:
+    if "risk_keys" in summary:
+        return summary["risk_keys"]
+    # Summaries written before risk_keys existed only list the top ten.
+    return [f"{risk['description']} ({risk['source']})" for risk in summary.get("global_risks", [])]
 
-    runbook_files = [fd for fd in files if fd.is_runbook]
-    todos: List[str] = []
 
-    # Build runbook cards
-    for fd in runbook_files:
-        card_content = build_runbook_card(fd, todos)
-        number = fd.runbook_number if fd.runbook_number is not None else "UNKNOWN"
-        card_path = OUTPUT_ROOT / "runbook_cards" / f"RUNBOOK_{number}_CARD.md"
-        write_file(card_path, card_content)
+def summary_delta(previous: Dict, current: Dict) -> Dict:
+    old_runbooks = {rb["path"]: rb for rb in previous.get("runbooks", [])}
+    new_runbooks = {rb["path"]: rb for rb in current.get("runbooks", [])}
+    colors = []
+    for path, rb in new_runbooks.items():
+        old = old_runbooks.get(path)
+        if old is None:
+            continue
+        old_passes = old.get("passes", {})
+        for name, color in rb["passes"].items():
+            if old_passes.get(name) != color:
+                colors.append({"runbook": path, "pass": name, "from": old_passes.get(name), "to": color})
+        if old.get("overall") != rb["overall"]:
+            colors.append({"runbook": path, "pass": "Overall", "from": old.get("overall"), "to": rb["overall"]})
+    return {
+        "runbooks": {
+            "added": [path for path in new_runbooks if path not in old_runbooks],
+            "removed": [path for path in old_runbooks if path not in new_runbooks],
+        },
+        "colors": colors,
+        "blocking_fixes": set_delta(previous.get("blocking_fixes", []), current.get("blocking_fixes", [])),
+        "risks": set_delta(risk_keys(previous), risk_keys(current)),
+        "todos": set_delta(previous.get("todos", []), current.get("todos", [])),
+    }
 
-    # Registries
-    contract_registry = build_contract_registry(files, todos)
-    write_file(OUTPUT_ROOT / "registries" / "CONTRACT_REGISTRY.md", contract_registry)
 
-    interface_atlas = build_interface_atlas(files, todos)
-    write_file(OUTPUT_ROOT / "registries" / "INTERFACE_ATLAS.md", interface_atlas)
+def format_delta(delta: Dict) -> List[str]:
+    lines = []
+    for path in delta["runbooks"]["added"]:
+        lines.append(f"+ runbook {path}")
+    for path in delta["runbooks"]["removed"]:
+        lines.append(f"- runbook {path}")
+    for change in delta["colors"]:
+        lines.append(f"~ {change['runbook']} {change['pass']}: {change['from'] or 'UNSPECIFIED'} -> {change['to']}")
+    for section in ("blocking_fixes", "risks", "todos"):
+        label = section.replace("_", " ").rstrip("s")
+        lines.extend(f"+ {label}: {item}" for item in delta[section]["added"])
+        lines.extend(f"- {label}: {item}" for item in delta[section]["removed"])
+    return lines
+
+
+# SQLite audit index.
+#
+# An optional sink mirroring the structured audit (files, headings, entries,
+# passes, todos) into SQLite, rebuilt in a single transaction per run, so
+# "which runbooks mention X" is an indexed lookup instead of a markdown grep.
+INDEX_PATH = OUTPUT_ROOT / "cache" / "audit_index.sqlite"
+
+INDEX_SCHEMA = """
+DROP TABLE IF EXISTS files;
+DROP TABLE IF EXISTS headings;
+DROP TABLE IF EXISTS entries;
+DROP TABLE IF EXISTS passes;
+DROP TABLE IF EXISTS todos;
+CREATE TABLE files (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    is_runbook INTEGER NOT NULL,
+    runbook_number INTEGER,
+    line_count INTEGER NOT NULL,
+    overall TEXT
+);
+CREATE TABLE headings (file_id INTEGER NOT NULL, line INTEGER NOT NULL, level INTEGER NOT NULL, title TEXT NOT NULL);
+CREATE TABLE entries (
+    file_id INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    name TEXT NOT NULL,
+    norm_name TEXT NOT NULL,
+    line_start INTEGER NOT NULL,
+    line_end INTEGER NOT NULL,
+    snippet TEXT NOT NULL
+);
+CREATE TABLE passes (file_id INTEGER NOT NULL, pass TEXT NOT NULL, color TEXT NOT NULL);
+CREATE TABLE todos (seq INTEGER PRIMARY KEY, message TEXT NOT NULL);
+CREATE INDEX entries_kind_name ON entries (kind, norm_name);
+CREATE INDEX entries_name ON entries (norm_name);
+CREATE INDEX entries_file ON entries (file_id);
+CREATE INDEX headings_file ON headings (file_id);
+CREATE INDEX passes_color ON passes (color, pass);
+CREATE INDEX files_runbook ON files (runbook_number);
+"""
+
+
+def write_sqlite_index(path: Path, files: List[FileData], passes_by_file: Dict[str, Dict[str, str]], todos: List[str]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path)
+    try:
+        with conn:
+            conn.executescript("BEGIN;" + INDEX_SCHEMA)
+            file_rows = []
+            heading_rows = []
+            entry_rows = []
+            pass_rows = []
+            for file_id, fd in enumerate(files, 1):
+                passes = passes_by_file.get(fd.rel_path)
+                overall = color_overall(passes) if passes is not None else None
+                file_rows.append((file_id, fd.rel_path, int(fd.is_runbook), fd.runbook_number, len(fd.lines), overall))
+                heading_rows.extend((file_id, line, level, title) for line, level, title in fd.headings)
+                for attr in ENTRY_FIELDS:
+                    entry_rows.extend(
+                        (file_id, e.kind, e.name, normalize_entry_name(e.name), e.line_start, e.line_end, e.snippet)
+                        for e in getattr(fd, attr)
+                    )
+                pass_rows.extend((file_id, name, color) for name, color in (passes or {}).items())
+            conn.executemany("INSERT INTO files VALUES (?, ?, ?, ?, ?, ?)", file_rows)
+            conn.executemany("INSERT INTO headings VALUES (?, ?, ?, ?)", heading_rows)
+            conn.executemany("INSERT INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)", entry_rows)
+            conn.executemany("INSERT INTO passes VALUES (?, ?, ?)", pass_rows)
+            conn.executemany("INSERT INTO todos VALUES (?, ?)", enumerate(todos, 1))
+    finally:
+        conn.close()
+
+
+def query_index(db_path: Path, args: argparse.Namespace) -> List[str]:
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        if args.endpoint:
+            rows = conn.execute(
+                "SELECT f.path, e.line_start, e.name FROM entries e JOIN files f ON f.id = e.file_id"
+                " WHERE e.kind = 'REST' AND e.norm_name = ? ORDER BY f.path, e.line_start",
+                (normalize_entry_name(args.endpoint),),
+            )
+            return [f"{path}:L{line}  {name}" for path, line, name in rows]
+        if args.name:
+            sql = (
+                "SELECT f.path, e.line_start, e.kind, e.name FROM entries e JOIN files f ON f.id = e.file_id"
+                " WHERE e.norm_name LIKE ? ESCAPE '\\'"
+            )
+            params: List = ["%" + normalize_entry_name(args.name).replace("%", "\\%").replace("_", "\\_") + "%"]
+            if args.kind:
+                sql += " AND e.kind = ?"
+                params.append(args.kind)
+            rows = conn.execute(sql + " ORDER BY f.path, e.line_start", params)
+            return [f"{path}:L{line}  {kind} {name}" for path, line, kind, name in rows]
+        if args.runbook:
+            key = int(args.runbook) if args.runbook.isdigit() else None
+            files = conn.execute(
+                "SELECT id, path, overall FROM files WHERE runbook_number = ? OR path = ? ORDER BY path",
+                (key, args.runbook),
+            ).fetchall()
+            out = []
+            for file_id, path, overall in files:
+                passes = conn.execute("SELECT pass, color FROM passes WHERE file_id = ? ORDER BY pass", (file_id,)).fetchall()
+                counts = conn.execute(
+                    "SELECT kind, COUNT(*) FROM entries WHERE file_id = ? GROUP BY kind ORDER BY kind", (file_id,)
+                ).fetchall()
+                out.append(f"{path}  overall={overall or 'UNSPECIFIED'}")
+                out.append("  " + ", ".join(f"{name}={color}" for name, color in passes))
+                out.append("  " + ", ".join(f"{kind}={count}" for kind, count in counts))
+            return out
+        if args.color:
+            if args.pass_name:
+                rows = conn.execute(
+                    "SELECT f.path FROM passes p JOIN files f ON f.id = p.file_id WHERE p.color = ? AND p.pass = ? ORDER BY f.path",
+                    (args.color.upper(), args.pass_name),
+                )
+            else:
+                rows = conn.execute("SELECT path FROM files WHERE overall = ? ORDER BY path", (args.color.upper(),))
+            return [path for (path,) in rows]
+        return []
+    finally:
+        conn.close()
+
+
+def parse_query_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="audit_runbooks.py query", description="Query the SQLite audit index.")
+    parser.add_argument("--db", default=str(INDEX_PATH), help=f"Index to read (default: {INDEX_PATH}).")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--endpoint", help='REST endpoint, e.g. "POST /api/ingest"; lists every file and line mentioning it.')
+    group.add_argument("--name", help="Substring of any detected entry name.")
+    group.add_argument("--runbook", help="Runbook number or relative path; shows pass colors and entry counts.")
+    group.add_argument("--color", help="RED, YELLOW or GREEN; lists runbooks with that overall color.")
+    parser.add_argument("--kind", help="Restrict --name to one entry kind (REST, IPC, Schema, Verification, Risk, Invariant, File).")
+    parser.add_argument("--pass", dest="pass_name", help='Restrict --color to one pass, e.g. "Pass 3".')
+    return parser.parse_args(argv)
+
+
+def peak_rss_kb() -> Optional[Dict[str, int]]:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS.
+    scale = 1024 if sys.platform == "darwin" else 1
+    return {
+        "self": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // scale,
+        "children": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss // scale,
+    }
 
-    invariant_catalog, invariants_list = build_invariant_catalog(files)
-    write_file(OUTPUT_ROOT / "registries" / "INVARIANT_CATALOG.md", invariant_catalog)
 
-    verification_gate_index, missing_gates = build_verification_gate_index(runbook_files, todos)
-    write_file(OUTPUT_ROOT / "registries" / "VERIFICATION_GATE_INDEX.md", verification_gate_index)
+def count_matches(files: List[FileData]) -> Dict[str, int]:
+    """Entries per detector; both schema patterns share FileData.schemas."""
+    counts = {name: 0 for name in ALL_DETECTORS}
+    attr_detectors = {"rest": "rest", "ipc": "ipc", "verifications": "verification", "risks": "risk", "invariants": "invariant", "files": "file"}
+    for fd in files:
+        for attr, name in attr_detectors.items():
+            counts[name] += len(getattr(fd, attr))
+        for entry in fd.schemas:
+            # SCHEMA_INTERFACE_PATTERN names are "<interface|type> <Name>"
+            counts["schema_interface" if entry.name.startswith(("interface ", "type ")) else "schema"] += 1
+    return counts
+
+
+def collect_metrics(files: List[FileData], timer: StageTimer, writer: OutputSink) -> Dict:
+    scanned = [fd for fd in files if not fd.from_cache]
+    return {
+        "stages": {
+            name: {"wall_s": round(timer.wall[name], 6), "cpu_s": round(timer.cpu.get(name, 0.0), 6)}
+            for name in timer.wall
+        },
+        "files": {
+            "discovered": len(files),
+            "skipped": len(files) - len(scanned),  # unchanged, loaded from the scan cache
+            "scanned": len(scanned),
+        },
+        "lines_scanned": sum(len(fd.lines) for fd in scanned),
+        "matches": count_matches(files),
+        "outputs": {
+            "changed": len(writer.changed),
+            "unchanged": len(writer.unchanged),
+            "bytes_written": writer.bytes_written,
+        },
+        "peak_rss_kb": peak_rss_kb(),
+    }
 
-    risk_register, risk_entries = build_risk_register(files)
-    write_file(OUTPUT_ROOT / "registries" / "RISK_REGISTER.md", risk_register)
 
-    # Passes and reports
-    passes_by_file: Dict[str, Dict[str, str]] = {}
-    for fd in runbook_files:
-        passes_by_file[fd.rel_path] = compute_passes(fd)
+# Report stage.
+#
+# The report builders form a small DAG run on a thread pool: a task starts as
+# soon as the tasks it needs have finished. Each task writes to its own
+# DeferredSink and records todos in its own list; the main thread replays the
+# writes and appends the todos in plan order as tasks complete, so file writes
+# overlap the builders still running while outputs, todo order and the
+# manifest stay exactly those of a serial run. Deferred output is spooled to a
+# temp file rather than held, so the streaming registry builders keep memory
+# flat however large the registries grow; a serial run writes straight to the
+# real sink.
+REPORT_THREADS = 4
+
+
+class DeferredSink(OutputSink):
+    """Spools writes and stale-output removals to a temp file for replay() onto another sink."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.spool = tempfile.TemporaryFile()
+        self.ops: List[Tuple[str, str, object]] = []
+
+    def write_lines(self, name: str, lines: Iterable[str]) -> bool:
+        start = self.spool.tell()
+        first = True
+        for line in lines:
+            if not first:
+                self.spool.write(b"\n")
+            self.spool.write(line.encode("utf-8"))
+            first = False
+        end = self.spool.tell()
+        # A terminator after each write keeps the last line from running into the next write.
+        self.spool.write(b"\n")
+        self.ops.append(("write", name, (start, end)))
+        return True
+
+    def remove_stale(self, directory: str, keep: Set[str]) -> None:
+        self.ops.append(("remove", directory, keep))
+
+    def spooled_lines(self, start: int, end: int) -> Iterator[str]:
+        self.spool.seek(start)
+        while self.spool.tell() <= end:
+            yield self.spool.readline()[:-1].decode("utf-8")
+
+    def replay(self, sink: OutputSink) -> None:
+        for op, name, arg in self.ops:
+            if op == "write":
+                sink.write_lines(name, self.spooled_lines(*arg))
+            else:
+                sink.remove_stale(name, arg)
+        self.ops = []
+        self.spool.close()
 
-    missing_contracts = [f"{e.name} ({e.source})" for fd in files for e in fd.rest if not fd.schemas]
-    ryg_report = build_ryg_report(runbook_files, passes_by_file, missing_contracts, missing_gates, risk_entries)
-    write_file(OUTPUT_ROOT / "reports" / "RYG_AUDIT_REPORT.md", ryg_report)
 
-    open_todos_content = build_open_todos(todos)
-    write_file(OUTPUT_ROOT / "reports" / "OPEN_TODOS.md", open_todos_content)
+@dataclass
+class ReportTask:
+    name: str
+    stage: str  # StageTimer stage the task's time is booked to
+    needs: Tuple[str, ...]
+    build: Callable[[OutputSink, List[str], Dict[str, object]], object]  # (sink, todos, results) -> result
+
+
+def run_report_tasks(tasks: List[ReportTask], writer: OutputSink, todos: List[str], timer: StageTimer, threads: int = REPORT_THREADS) -> Dict[str, object]:
+    """Run tasks (listed in plan order, needs before dependents) and return their results by name."""
+    results: Dict[str, object] = {}
+    task_todos: Dict[str, List[str]] = {task.name: [] for task in tasks}
+
+    def execute(task: ReportTask, sink: OutputSink) -> object:
+        with timer.stage(task.stage):
+            return task.build(sink, task_todos[task.name], results)
+
+    if threads <= 1:
+        for task in tasks:
+            results[task.name] = execute(task, writer)
+            todos.extend(task_todos[task.name])
+        return results
+
+    sinks = {task.name: DeferredSink() for task in tasks}
+    replayed = 0
+    running: Dict[Future, ReportTask] = {}
+    waiting = list(tasks)
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        while waiting or running:
+            for task in [t for t in waiting if all(need in results for need in t.needs)]:
+                waiting.remove(task)
+                running[pool.submit(execute, task, sinks[task.name])] = task
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                results[running.pop(future).name] = future.result()
+            while replayed < len(tasks) and tasks[replayed].name in results:
+                sinks[tasks[replayed].name].replay(writer)
+                todos.extend(task_todos[tasks[replayed].name])
+                replayed += 1
+    return results
+
+
+# In-process API.
+#
+# audit() runs discovery, scanning and report generation without touching
+# module globals, so editor tooling and tests can audit any tree and read the
+# structured result directly; outputs go to a sink, in memory by default.
+@dataclass
+class AuditOptions:
+    root: Optional[Path] = None  # tree to audit; rel_paths are relative to it (default: RUNBOOK_ROOT)
+    output_root: Optional[Path] = None  # never descended into (default: the sink's root, else OUTPUT_ROOT)
+    sink: Optional[OutputSink] = None  # default: a fresh MemorySink
+    excludes: Sequence[str] = DEFAULT_EXCLUDES
+    use_gitignore: bool = True
+    jobs: int = 1
+    report_threads: int = REPORT_THREADS
+    grouped: bool = True
+    cache_path: Optional[Path] = None  # scan cache to read and update; None disables it
+    cache: Optional[ScanCache] = None  # an already loaded scan cache, saved by the caller; overrides cache_path
+    pool: Optional[Executor] = None  # process pool to scan in, left running (default: one per run when jobs > 1)
+    index_path: Optional[Path] = None  # also write a SQLite index there
+    include_metrics: bool = False
+    sharded: bool = False  # split registries and todos into per-file shards behind an index
+    changed_since: Optional[str] = None  # git fast path: re-scan only files changed since this rev
+    staged: bool = False  # git fast path: re-scan only files staged in the index, audited as staged
 
-    blocking_fixes = []
-    for fd in runbook_files:
-        for k, v in passes_by_file.get(fd.rel_path, {}).items():
-            if v == "RED":
-                blocking_fixes.append(f"{fd.rel_path} {k} RED ({fd.rel_path}:L1-L{len(fd.lines) or 1})")
 
-    audit_summary = build_audit_summary_json(runbook_files, passes_by_file, blocking_fixes, missing_contracts, missing_gates, risk_entries, todos)
-    write_file(OUTPUT_ROOT / "reports" / "audit_summary.json", audit_summary)
+@dataclass
+class AuditResult:
+    files: List[FileData]
+    passes: Dict[str, Dict[str, str]]  # runbook rel_path -> pass -> color
+    todos: List[str]
+    blocking_fixes: List[str]
+    missing_contracts: List[str]
+    missing_gates: List[str]
+    risks: List[DetectedEntry]
+    graph: DependencyGraph
+    summary: Dict  # the audit_summary.json payload
+    outputs: OutputSink
+    timer: StageTimer
+
+    @property
+    def changed(self) -> List[str]:
+        return self.outputs.changed
+
+
+def generate_reports(
+    files: List[FileData],
+    writer: OutputSink,
+    options: AuditOptions,
+    card_cache: Optional[CardCache] = None,
+    timer: Optional[StageTimer] = None,
+    graph: Optional[DependencyGraph] = None,
+    changed: Optional[Iterable[str]] = None,
+) -> AuditResult:
+    """Build every card, registry and report, hand them to writer and return the result.
+
+    options supplies the report settings: grouped, sharded (the contract
+    registry, interface atlas and open todos split per source file),
+    include_metrics (a metrics section in audit_summary.json covering every
+    stage up to the summary itself), index_path (the structured results also
+    written to a SQLite index) and report_threads (1 builds everything
+    serially).
+    card_cache maps rel_path to a previously built card with its todos and
+    section flags, and is filled as cards are built; callers drop entries for
+    files that changed.
+    A graph from an earlier call is updated in place; changed then names the
+    runbooks (runbook_label) whose files changed since, so only their
+    downstream closure is re-checked.
+    """
+    timer = timer or StageTimer()
+    grouped, sharded = options.grouped, options.sharded
+    runbook_files = [fd for fd in files if fd.is_runbook]
+    todos: List[str] = []
+    if graph is None:
+        graph = DependencyGraph()
+        changed = None
+
+    def build_cards(sink: OutputSink, task_todos: List[str], results: Dict[str, object]) -> None:
+        # Runbooks sharing a number share a card path; the last one in sort
+        # order wins, as it always has.
+        cards: Dict[str, str] = {}
+        for fd in runbook_files:
+            if card_cache is not None and fd.rel_path in card_cache:
+                card_content, card_todos, flags = card_cache[fd.rel_path]
+                fd.has_purpose, fd.has_produces, fd.has_consumes = flags
+            else:
+                card_todos = []
+                card_content = build_runbook_card(fd, card_todos)
+                if card_cache is not None:
+                    card_cache[fd.rel_path] = (card_content, card_todos, (fd.has_purpose, fd.has_produces, fd.has_consumes))
+            task_todos.extend(card_todos)
+            number = fd.runbook_number if fd.runbook_number is not None else "UNKNOWN"
+            cards[f"runbook_cards/RUNBOOK_{number}_CARD.md"] = card_content
+        for card_name, card_content in cards.items():
+            sink.write_file(card_name, card_content)
+
+    def build_dependencies(sink: OutputSink, task_todos: List[str], results: Dict[str, object]) -> None:
+        graph.update(files, changed)
+        sink.write_file("reports/DEPENDENCY_GRAPH.md", build_dependency_report(graph))
+
+    def build_contracts(sink: OutputSink, task_todos: List[str], results: Dict[str, object]) -> None:
+        links = results["linking"]
+        if sharded:
+            # Shards interleave contract and interface todos per file.
+            write_sharded_registries(files, sink, task_todos, grouped, links)
+            return
+        sink.write_lines("registries/CONTRACT_REGISTRY.md", build_contract_registry(files, task_todos, grouped, links=links))
+
+    def build_interfaces(sink: OutputSink, task_todos: List[str], results: Dict[str, object]) -> None:
+        sink.write_lines("registries/INTERFACE_ATLAS.md", build_interface_atlas(files, task_todos, grouped, links=results["linking"]))
+        for directory in SHARD_DIRS:
+            sink.remove_stale(directory, set())
+
+    def build_gates(sink: OutputSink, task_todos: List[str], results: Dict[str, object]) -> List[str]:
+        verification_gate_index, missing_gates = build_verification_gate_index(runbook_files, task_todos)
+        sink.write_file("registries/VERIFICATION_GATE_INDEX.md", verification_gate_index)
+        return missing_gates
+
+    def build_risks(sink: OutputSink, task_todos: List[str], results: Dict[str, object]) -> List[DetectedEntry]:
+        sink.write_lines("registries/RISK_REGISTER.md", build_risk_register(files, grouped))
+        return [group.first for group in entry_groups(files, ["risks"], grouped)]
+
+    def build_ryg(sink: OutputSink, task_todos: List[str], results: Dict[str, object]) -> Tuple[Dict[str, Dict[str, str]], List[str]]:
+        passes_by_file = {fd.rel_path: compute_passes(fd, graph) for fd in runbook_files}
+        missing_contracts = [f"{e.name} ({e.source})" for fd in files for e in fd.rest if not fd.schemas]
+        sink.write_file("reports/RYG_AUDIT_REPORT.md", build_ryg_report(runbook_files, passes_by_file, missing_contracts, results["gates"], results["risks"]))
+        return passes_by_file, missing_contracts
+
+    tasks = [
+        ReportTask("cards", "cards", (), build_cards),
+        ReportTask("linking", "linking", (), lambda sink, task_todos, results: link_interfaces(files)),
+        ReportTask("dependencies", "dependencies", (), build_dependencies),
+        ReportTask("contracts", "registries", ("linking",), build_contracts),
+    ]
+    if not sharded:
+        tasks.append(ReportTask("interfaces", "registries", ("linking",), build_interfaces))
+    tasks += [
+        ReportTask("invariants", "registries", (), lambda sink, task_todos, results: sink.write_lines("registries/INVARIANT_CATALOG.md", build_invariant_catalog(files, grouped))),
+        ReportTask("gates", "registries", (), build_gates),
+        ReportTask("risks", "registries", (), build_risks),
+        ReportTask("ryg", "reports", ("cards", "dependencies", "gates", "risks"), build_ryg),
+    ]
+    results = run_report_tasks(tasks, writer, todos, timer, options.report_threads)
+    passes_by_file, missing_contracts = results["ryg"]
+    missing_gates = results["gates"]
+    risk_entries = results["risks"]
+
+    with timer.stage("reports"):
+        # Open todos need every other builder's todos, so they come last.
+        if sharded:
+            write_sharded_todos(todos, writer)
+        else:
+            writer.write_file("reports/OPEN_TODOS.md", build_open_todos(todos))
+
+        blocking_fixes = []
+        for fd in runbook_files:
+            for k, v in passes_by_file.get(fd.rel_path, {}).items():
+                if v == "RED":
+                    blocking_fixes.append(f"{fd.rel_path} {k} RED ({fd.rel_path}:L1-L{len(fd.lines) or 1})")
+
+    with timer.stage("summary"):
+        metrics = collect_metrics(files, timer, writer) if options.include_metrics else None
+        audit_summary = build_audit_summary(runbook_files, passes_by_file, blocking_fixes, missing_contracts, missing_gates, risk_entries, todos, metrics, graph)
+        writer.write_file("reports/audit_summary.json", json.dumps(audit_summary, indent=2))
+
+    if options.index_path is not None:
+        with timer.stage("index"):
+            write_sqlite_index(options.index_path, files, passes_by_file, todos)
+
+    return AuditResult(files, passes_by_file, todos, blocking_fixes, missing_contracts, missing_gates, risk_entries, graph, audit_summary, writer, timer)
+
+
+def audit(paths: Optional[Sequence[Path]] = None, options: Optional[AuditOptions] = None) -> AuditResult:
+    """Audit a runbook tree in-process and return the structured result.
+
+    paths limits the audit to those files and directories (relative ones are
+    taken from options.root); by default the whole root is discovered. A
+    partial audit leaves cache records for files outside paths in place. The
+    git fast path needs cache_path; without cached records it audits in full.
+    """
+    options = options or AuditOptions()
+    root = options.root if options.root is not None else RUNBOOK_ROOT
+    sink = options.sink if options.sink is not None else MemorySink()
+    output_root = options.output_root
+    if output_root is None and isinstance(sink, OutputWriter):
+        output_root = sink.root
+    options = replace(options, root=root, sink=sink, output_root=output_root)
+    timer = StageTimer()
+    cache = options.cache
+    if cache is None and options.cache_path is not None:
+        cache = ScanCache(options.cache_path)
+        cache.load()
+    changed: Optional[Set[str]] = None
+    contents: Optional[Dict[str, Optional[bytes]]] = None
+    if options.changed_since is not None or options.staged:
+        with timer.stage("discovery"):
+            changed = git_changed_paths(root, options.changed_since, options.staged)
+            if options.staged:
+                contents = git_index_contents(root, changed)
+    files = scan_files(options, cache, timer, paths, changed, contents)
+    card_cache = cache.cards if cache is not None else None
+    result = generate_reports(files, sink, options, card_cache, timer)
+    if cache is not None and options.cache is None:
+        # Saved after the reports so the cards built in this run are kept.
+        with timer.stage("cache"):
+            cache.save(prune=paths is None)
+    return result
+
+
+def check_jobs_parity(jobs: int, root: Optional[Path] = None) -> List[str]:
+    """Audit root serially and with jobs worker processes, and list the outputs that differ."""
+    outputs = []
+    for workers in (1, jobs):
+        sink = MemorySink()
+        audit(options=AuditOptions(root=root, sink=sink, output_root=OUTPUT_ROOT, jobs=workers))
+        outputs.append(sink.outputs)
+    serial, parallel = outputs
+    return sorted(name for name in serial.keys() | parallel.keys() if serial.get(name) != parallel.get(name))
+
+
+# Batch audit.
+#
+# Several runbook trees in one run pay for interpreter startup, pattern
+# compilation and the scan process pool once. Each tree keeps its outputs under
+# its own output root; the scan records of all of them share one cache file,
+# and reports/CROSS_REPO_RYG_SUMMARY.md in OUTPUT_ROOT sums them up.
+BATCH_CACHE_PATH = OUTPUT_ROOT / "cache" / "batch_scan_cache.json"
+RYG_COLORS = ("GREEN", "YELLOW", "RED", "UNSPECIFIED")
+
+
+class BatchCache:
+    """One scan cache file holding a ScanCache per root, keyed by resolved path."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.data: Dict[str, Dict] = {}
+        self.caches: Dict[str, ScanCache] = {}
+
+    def load(self) -> None:
+        try:
+            self.data = json.loads(self.path.read_text(encoding="utf-8")).get("roots", {})
+        except (OSError, ValueError, AttributeError):
+            self.data = {}
+
+    def for_root(self, root: Path) -> ScanCache:
+        key = str(root.resolve())
+        cache = ScanCache(self.path)
+        cache.restore(self.data.get(key, {}))
+        self.caches[key] = cache
+        return cache
+
+    def save(self) -> None:
+        # Roots not audited in this run keep their records.
+        roots = {**self.data, **{key: cache.dump() for key, cache in self.caches.items()}}
+        save_json(self.path, {"roots": dict(sorted(roots.items()))})
+
+
+def root_output(root: Path) -> Path:
+    """Default output directory for a runbook tree: OUTPUT_ROOT for RUNBOOK_ROOT, else <root>/_runbook_audit.
+
+    DEFAULT_EXCLUDES prunes _runbook_audit, so the outputs are never scanned
+    as runbooks on the next run.
+    """
+    if root.resolve() == RUNBOOK_ROOT:
+        return OUTPUT_ROOT
+    return root / ROOT_OUTPUT_DIR
+
+
+def parse_root(value: str) -> Tuple[Path, Optional[Path]]:
+    """--root PATH or PATH=OUT; a PATH that exists with "=" in its name is taken whole."""
+    path, sep, output = value.partition("=")
+    if not sep or Path(value).exists():
+        return Path(value), None
+    return Path(path), Path(output)
+
+
+def audit_roots(roots: Sequence[Path], options: Optional[AuditOptions] = None, outputs: Optional[Dict[Path, Path]] = None) -> Dict[Path, AuditResult]:
+    """Audit each root in turn with options and return the results by root.
+
+    Each root is written to an OutputWriter at outputs[root], or at
+    root_output(root) when outputs does not name it, so options.root and
+    options.sink are ignored. options.cache_path names the shared cache
+    file, and with jobs > 1 every root is scanned in one pool.
+    """
+    options = options or AuditOptions()
+    outputs = outputs or {}
+    batch: Optional[BatchCache] = None
+    if options.cache_path is not None:
+        batch = BatchCache(options.cache_path)
+        batch.load()
+    results: Dict[Path, AuditResult] = {}
+    with ProcessPoolExecutor(max_workers=options.jobs) if options.jobs > 1 else nullcontext() as pool:
+        for root in roots:
+            root_options = replace(
+                options,
+                root=root,
+                sink=OutputWriter(outputs.get(root) or root_output(root)),
+                output_root=None,
+                cache=batch.for_root(root) if batch is not None else None,
+                pool=pool,
+            )
+            results[root] = audit(options=root_options)
+    if batch is not None:
+        batch.save()
+    return results
+
+
+def build_cross_repo_summary(results: Dict[Path, AuditResult]) -> Tuple[str, Dict]:
+    """Markdown and JSON RYG roll-up over several audited roots."""
+    roots_data = []
+    totals = {"runbooks": 0, **{color: 0 for color in RYG_COLORS}, "blocking_fixes": 0, "todos": 0}
+    for root, result in results.items():
+        overall = {rel_path: color_overall(passes) for rel_path, passes in result.passes.items()}
+        counts = {color: sum(1 for value in overall.values() if value == color) for color in RYG_COLORS}
+        data = {
+            "root": str(root),
+            "output": str(result.outputs.root) if isinstance(result.outputs, OutputWriter) else None,
+            "runbooks": len(overall),
+            **counts,
+            "blocking_fixes": len(result.blocking_fixes),
+            "todos": len(dict.fromkeys(result.todos)),
+            "overall": overall,
+        }
+        roots_data.append(data)
+        for key in totals:
+            totals[key] += data[key]
+
+    header = ["Root", "Runbooks", *RYG_COLORS, "Blocking Fixes", "Open TODOs"]
+    lines = ["# Cross-Repository RYG Summary", "", "| " + " | ".join(header) + " |", "| " + " | ".join(["---"] * len(header)) + " |"]
+    for data in [*roots_data, {"root": "Total", **totals}]:
+        lines.append("| " + " | ".join(str(data[key]) for key in ["root", "runbooks", *RYG_COLORS, "blocking_fixes", "todos"]) + " |")
+    for data in roots_data:
+        lines.append("")
+        lines.append(f"## {data['root']}")
+        if not data["overall"]:
+            lines.append("- No runbooks found.")
+        for rel_path, color in data["overall"].items():
+            lines.append(f"- {rel_path}: {color}")
+    return "\n".join(lines), {"roots": roots_data, "totals": totals}
+
+
+def snapshot_paths(excludes: Sequence[str], use_gitignore: bool) -> Dict[str, Tuple[Tuple[Path, str, bool, Optional[int]], int, int]]:
+    snapshot = {}
+    for path_info in discover_paths(excludes, use_gitignore):
+        try:
+            st = path_info[0].stat()
+        except OSError:
+            continue
+        snapshot[path_info[1]] = (path_info, st.st_mtime_ns, st.st_size)
+    return snapshot
+
+
+def watch(files: List[FileData], cache: Optional[ScanCache], options: AuditOptions, interval: float) -> None:
+    """Poll RUNBOOK_ROOT and re-audit only the markdown files that changed.
+
+    Only changed files are re-scanned and only their cards are rebuilt; every
+    output is regenerated in memory but rewritten only if its content changed.
+    """
+    by_path = {fd.rel_path: fd for fd in files}
+    card_cache: CardCache = cache.cards if cache is not None else {}
+    writer = OutputWriter()
+    graph = generate_reports(files, writer, options, card_cache).graph
+    excludes, use_gitignore, jobs = options.excludes, options.use_gitignore, options.jobs
+    snapshot = snapshot_paths(excludes, use_gitignore)
+    print(f"Watching {RUNBOOK_ROOT} ({len(snapshot)} files); press Ctrl+C to stop.")
+    try:
+        while True:
+            time.sleep(interval)
+            current = snapshot_paths(excludes, use_gitignore)
+            changed = [rel for rel, state in current.items() if snapshot.get(rel, (None,))[1:] != state[1:]]
+            removed = [rel for rel in snapshot if rel not in current]
+            snapshot = current
+            if not changed and not removed:
+                continue
+            started = time.perf_counter()
+            tasks: List[ScanTask] = [(*current[rel][0], None, cache is not None, None) for rel in changed]
+            if jobs > 1 and len(tasks) > 1:
+                with ProcessPoolExecutor(max_workers=jobs) as pool:
+                    results = list(pool.map(read_and_scan, tasks))
+            else:
+                results = [read_and_scan(task) for task in tasks]
+            dirty = {runbook_label(by_path[rel]) for rel in changed + removed if rel in by_path and by_path[rel].is_runbook}
+            for fd, stamp in results:
+                if fd.is_runbook:
+                    dirty.add(runbook_label(fd))
+                by_path[fd.rel_path] = fd
+                card_cache.pop(fd.rel_path, None)
+                if cache is not None:
+                    cache.update(fd, stamp)
+            for rel in removed:
+                by_path.pop(rel, None)
+                card_cache.pop(rel, None)
+                if cache is not None:
+                    cache.stamps.pop(rel, None)
+            if cache is not None:
+                cache.save()
+
+            files = list(by_path.values())
+            sort_files(files)
+            writer.reset()
+            result = generate_reports(files, writer, options, card_cache, graph=graph, changed=dirty)
+            written = result.changed
+            elapsed = time.perf_counter() - started
+            print(f"Re-audited {len(changed)} changed, {len(removed)} removed file(s) in {elapsed:.3f}s; rewrote {len(written)} output(s)")
+            for name in written:
+                print(f"  {name}")
+            for name in result.outputs.removed:
+                print(f"  removed {name}")
+    except KeyboardInterrupt:
+        print("Stopped watching.")
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Audit runbooks and regenerate cards, registries and reports.",
+        epilog="Run 'audit_runbooks.py query --help' to query a SQLite index written with --sqlite.",
+    )
+    parser.add_argument(
+        "--check-scanner-parity",
+        action="store_true",
+        help="Scan with both the single-pass and the per-regex engine, report differences and exit.",
+    )
+    parser.add_argument(
+        "--check-jobs-parity",
+        action="store_true",
+        help="Audit serially and with --jobs workers (at least 2) in memory, report outputs that differ and exit.",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Read and scan files in N worker processes (0 uses every CPU).",
+    )
+    parser.add_argument(
+        "--report-threads",
+        type=int,
+        default=REPORT_THREADS,
+        help=f"Build cards, registries and reports on N threads (default {REPORT_THREADS}; 1 builds them serially).",
+    )
+    parser.add_argument(
+        "--exclude",
+        action="append",
+        default=[],
+        metavar="DIR",
+        help="Directory name to skip during discovery, in addition to %s (repeatable)." % ", ".join(DEFAULT_EXCLUDES),
+    )
+    parser.add_argument("--no-gitignore", action="store_true", help="Do not apply .gitignore rules during discovery.")
+    parser.add_argument(
+        "--flat-entries",
+        action="store_true",
+        help="List every detected entry separately in registries instead of grouping repeats.",
+    )
+    parser.add_argument(
+        "--sharded",
+        action="store_true",
+        help="Split the contract registry, interface atlas and open todos into one shard per source file behind an index page.",
+    )
+    parser.add_argument(
+        "--manifest",
+        metavar="PATH",
+        help="Write a JSON manifest of changed, unchanged and removed outputs to PATH.",
+    )
+    parser.add_argument(
+        "--metrics",
+        action="store_true",
+        help="Add per-stage timings and counters to reports/audit_summary.json.",
+    )
+    parser.add_argument(
+        "--diff",
+        metavar="PREVIOUS",
+        help="Compare against a previous audit_summary.json; print only the changes and write reports/audit_delta.json.",
+    )
+    parser.add_argument(
+        "--sqlite",
+        nargs="?",
+        const=str(INDEX_PATH),
+        metavar="PATH",
+        help=f"Also write the audit to a SQLite index (default path: {INDEX_PATH}).",
+    )
+    parser.add_argument("--profile", metavar="PATH", help="Write cProfile stats for the whole run to PATH.")
+    git_mode = parser.add_mutually_exclusive_group()
+    git_mode.add_argument(
+        "--changed-since",
+        metavar="REV",
+        help="Ask git which markdown files changed since REV and re-scan only those, reusing cached results for the rest.",
+    )
+    git_mode.add_argument("--staged", action="store_true", help="Like --changed-since, for the files staged in the index, audited as staged rather than as on disk (for pre-commit).")
+    parser.add_argument("--watch", action="store_true", help="Keep running and re-audit runbooks as they change.")
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=0.25,
+        help="Polling interval in seconds for --watch (default: 0.25).",
+    )
+    parser.add_argument(
+        "--root",
+        action="append",
+        default=[],
+        metavar="PATH[=OUT]",
+        help=f"Also audit the runbook tree at PATH, writing its outputs to OUT (default: PATH/{ROOT_OUTPUT_DIR}) (repeatable). All trees share one scan pool and cache file, and reports/CROSS_REPO_RYG_SUMMARY.md sums them up.",
+    )
+    parser.add_argument("--no-cache", action="store_true", help="Neither read nor write the scan cache.")
+    parser.add_argument("--clear-cache", action="store_true", help="Discard the scan cache before scanning.")
+    args = parser.parse_args(argv)
+    if args.diff and args.watch:
+        parser.error("--diff cannot be combined with --watch")
+    if (args.changed_since or args.staged) and (args.watch or args.no_cache):
+        parser.error("--changed-since/--staged need the scan cache and cannot be combined with --watch")
+    if args.root and (args.watch or args.diff or args.sqlite or args.changed_since or args.staged):
+        parser.error("--root cannot be combined with --watch, --diff, --sqlite, --changed-since or --staged")
+    return args
+
+
+def run(args: argparse.Namespace) -> None:
+    ensure_dirs()
+    # Read before generating: PREVIOUS is often the summary about to be rewritten.
+    previous = load_summary(Path(args.diff)) if args.diff else None
+    cache_path = None if args.no_cache else BATCH_CACHE_PATH if args.root else CACHE_PATH
+    if cache_path is not None and args.clear_cache:
+        cache_path.unlink(missing_ok=True)
+    jobs = args.jobs or os.cpu_count() or 1
+    excludes = [*DEFAULT_EXCLUDES, *args.exclude]
+    index_path = Path(args.sqlite) if args.sqlite else None
+
+    options = AuditOptions(
+        sink=OutputWriter(),
+        excludes=excludes,
+        use_gitignore=not args.no_gitignore,
+        jobs=jobs,
+        report_threads=max(args.report_threads, 1),
+        grouped=not args.flat_entries,
+        cache_path=cache_path,
+        index_path=index_path,
+        include_metrics=args.metrics,
+        sharded=args.sharded,
+        changed_since=args.changed_since,
+        staged=args.staged,
+    )
+    if args.watch:
+        cache: Optional[ScanCache] = None
+        if cache_path is not None:
+            cache = ScanCache(cache_path)
+            cache.load()
+        files = scan_files(options, cache)
+        if cache is not None:
+            cache.save()
+        watch(files, cache, options, args.interval)
+        return
+
+    if args.root:
+        extra = [parse_root(value) for value in args.root]
+        outputs = {root: output for root, output in extra if output is not None}
+        run_batch([RUNBOOK_ROOT, *(root for root, _ in extra)], options, args.manifest, outputs)
+        return
+    result = audit(options=options)
+    if previous is not None:
+        delta = summary_delta(previous, result.summary)
+        result.outputs.write_file("reports/audit_delta.json", json.dumps(delta, separators=(",", ":")))
+        delta_lines = format_delta(delta)
+        print(f"{len(delta_lines)} change(s) since {args.diff}")
+        for line in delta_lines:
+            print(f"  {line}")
+    manifest = result.outputs.manifest()
+    print(f"{len(manifest['changed'])} output(s) changed, {len(manifest['unchanged'])} unchanged")
+    for rel_path in manifest["changed"]:
+        print(f"  {rel_path}")
+    for rel_path in manifest["removed"]:
+        print(f"  removed {rel_path}")
+    if args.manifest:
+        write_file(Path(args.manifest), json.dumps(manifest, indent=2))
+
+
+def run_batch(roots: List[Path], options: AuditOptions, manifest_path: Optional[str], outputs: Optional[Dict[Path, Path]] = None) -> None:
+    results = audit_roots(roots, options, outputs)
+    writer = OutputWriter()
+    markdown, data = build_cross_repo_summary(results)
+    writer.write_file("reports/CROSS_REPO_RYG_SUMMARY.md", markdown)
+    writer.write_file("reports/cross_repo_summary.json", json.dumps(data, indent=2))
+    manifests = {}
+    for root, result in results.items():
+        manifest = result.outputs.manifest()
+        manifests[str(root)] = manifest
+        print(f"{root}: {len(manifest['changed'])} output(s) changed, {len(manifest['unchanged'])} unchanged")
+        for rel_path in manifest["changed"]:
+            print(f"  {rel_path}")
+        for rel_path in manifest["removed"]:
+            print(f"  removed {rel_path}")
+    totals = data["totals"]
+    print(f"{len(roots)} root(s), {totals['runbooks']} runbook(s): " + ", ".join(f"{totals[color]} {color}" for color in RYG_COLORS))
+    if manifest_path:
+        manifests["summary"] = writer.manifest()
+        write_file(Path(manifest_path), json.dumps(manifests, indent=2))
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["query"]:
+        query_args = parse_query_args(argv[1:])
+        for line in query_index(Path(query_args.db), query_args):
+            print(line)
+        return
+
+    args = parse_args(argv)
+    if args.check_scanner_parity:
+        mismatched = check_scan_parity(discover_files())
+        for rel_path in mismatched:
+            print(f"Scanner mismatch: {rel_path}")
+        if mismatched:
+            raise SystemExit(1)
+        print("Scanner parity OK")
+        return
+    if args.check_jobs_parity:
+        jobs = max(args.jobs or os.cpu_count() or 1, 2)
+        mismatched = check_jobs_parity(jobs)
+        for name in mismatched:
+            print(f"Output differs with --jobs {jobs}: {name}")
+        if mismatched:
+            raise SystemExit(1)
+        print(f"Jobs parity OK (serial vs --jobs {jobs})")
+        return
+
+    if not args.profile:
+        run(args)
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        run(args)
+    finally:
+        profiler.disable()
+        profiler.dump_stats(args.profile)
+        print(f"Profile written to {args.profile} (inspect with python -m pstats)")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,135 @@
+"""Benchmark audit_runbooks.py on synthetic runbook trees.
+
+Generates trees of configurable size with heading and interface density
+modelled on the real runbooks, runs every audit stage against each tree and
+records per-stage wall time to a JSON file so regressions can be tracked.
+
+    python bench_audit_runbooks.py --sizes 10 100 1000 --output bench.json
+"""
+
+import argparse
+import json
+import platform
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import audit_runbooks as audit  # noqa: E402
+
+
+DEFAULT_SIZES = [10, 100, 1000, 10000]
+STAGES = ["discovery", "scanning", "cards", "linking", "dependencies", "registries", "reports", "summary"]
+
+# Share of body lines carrying each kind of content, roughly as measured on
+# Runbooks/ (57k lines: ~6% headings, ~3% file refs, ~2% IPC/schema lines,
+# under 1% REST, verification, risk and invariant lines).
+LINE_MIX = [
+    ("heading", 0.06),
+    ("rest", 0.01),
+    ("ipc", 0.02),
+    ("schema", 0.02),
+    ("verification", 0.01),
+    ("risk", 0.005),
+    ("invariant", 0.005),
+    ("file", 0.03),
+]
+
+SECTION_TITLES = ["Purpose", "Produces (Artifacts)", "Consumes (Prereqs)", "Process Lifecycle", "Implementation", "Verification"]
+SERVICES = ["records", "ingestion", "export", "caselaw", "facts", "exhibits", "citations", "templates"]
+METHODS = ["GET", "POST", "PUT", "PATCH", "DELETE"]
+WORDS = "the service stores each draft section and returns a stable identifier for the clerk panel".split()
+
+
+def synthetic_line(rng: random.Random, kind: str) -> str:
+    service = rng.choice(SERVICES)
+    if kind == "heading":
+        return f"{'#' * rng.randint(2, 4)} {rng.choice(SECTION_TITLES)} {rng.randint(1, 9)}"
+    if kind == "rest":
+        return f"- `{rng.choice(METHODS)} /api/{service}/:id` returns the {service} record"
+    if kind == "ipc":
+        return f"Renderer calls ipcRenderer.invoke('{service}:load') over the {service} channel"
+    if kind == "schema":
+        return f"interface {service.title()}Record extends LegalDocument Schema"
+    if kind == "verification":
+        return f"Verify: `pnpm test --filter {service}` passes"
+    if kind == "risk":
+        return f"HIGH RISK: {service} migration is a blocker if the schema drifts"
+    if kind == "invariant":
+        return f"Invariant: every {service} section keeps its sectionId"
+    if kind == "file":
+        return f"Output is written to {service}/{rng.randint(1, 99):02d}_{service}.json"
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 16)))
+
+
+def synthetic_runbook(rng: random.Random, number: int, lines: int) -> str:
+    out: List[str] = [f"# Runbook {number}: Synthetic Service {number}", ""]
+    kinds = [kind for kind, _ in LINE_MIX] + ["prose"]
+    weights = [weight for _, weight in LINE_MIX] + [1.0 - sum(weight for _, weight in LINE_MIX)]
+    for title in SECTION_TITLES[:4]:
+        out.append(f"## {title}")
+        out.append(synthetic_line(rng, "prose"))
+    while len(out) < lines:
+        out.append(synthetic_line(rng, rng.choices(kinds, weights)[0]))
+    return "\n".join(out) + "\n"
+
+
+def generate_tree(root: Path, files: int, lines: int, seed: int) -> None:
+    """Lay out runbooks, metadata files and READMEs across nested folders."""
+    rng = random.Random(seed)
+    for idx in range(files):
+        folder = root / f"area_{idx // 100:03d}"
+        if idx % 10 == 9:
+            path = folder / f"sub_{idx:05d}" / "README.md"
+        elif idx % 3 == 2:
+            path = folder / "Metadata" / f"RUNBOOK_{idx}_METADATA.md"
+        else:
+            path = folder / f"{idx:05d}_RUNBOOK_{idx}_SERVICE.md"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(synthetic_runbook(rng, idx, lines), encoding="utf-8")
+
+
+def run_audit(tree: Path, output: Path, jobs: int) -> Dict[str, float]:
+    # Serial report builders, so the per-stage times do not overlap and add up to the run.
+    options = audit.AuditOptions(root=tree, sink=audit.OutputWriter(output), use_gitignore=False, jobs=jobs, report_threads=1)
+    timer = audit.audit(options=options).timer
+    return {stage: round(timer.wall.get(stage, 0.0), 6) for stage in STAGES}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the runbook auditor on synthetic trees.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Tree sizes in files (default: 10 100 1000 10000).")
+    parser.add_argument("--lines", type=int, default=200, help="Lines per synthetic file (default: 200).")
+    parser.add_argument("--jobs", type=int, default=1, help="Worker processes for the scan stage.")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed for tree generation.")
+    parser.add_argument("--output", default="bench_results.json", help="Where to write the JSON results.")
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory(prefix="runbook_bench_") as tmp:
+            tree = Path(tmp) / "runbooks"
+            generate_tree(tree, size, args.lines, args.seed)
+            started = time.perf_counter()
+            stages = run_audit(tree, Path(tmp) / "audit", args.jobs)
+            total = time.perf_counter() - started
+        results.append({"files": size, "lines_per_file": args.lines, "stages": stages, "total": round(total, 6)})
+        print(f"{size:>6} files: {total:8.3f}s  " + "  ".join(f"{k}={v:.3f}" for k, v in stages.items()))
+
+    data = {
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "jobs": args.jobs,
+        "results": results,
+    }
+    Path(args.output).write_text(json.dumps(data, indent=2) + "\n", encoding="utf-8")
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
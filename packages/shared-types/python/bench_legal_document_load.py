@@ -0,0 +1,190 @@
+"""Benchmark LegalDocument loading: validation with and without the cycle collector.
+
+Generates documents of configurable size (top-level sections with nested
+children, paragraphs split into sentences, lists) and times, on the same
+stamped bytes, LegalDocument.model_validate_json as is, load_document under
+collection_paused(), and for comparison a model_construct walk that skips the
+field checks (also with the collector paused), recording the best of several
+runs to a JSON file.
+
+    python bench_legal_document_load.py --sizes 1000 10000 --output bench.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+from pathlib import Path
+from datetime import datetime
+from typing import Any, Callable
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from legal_document import (  # noqa: E402
+    DocumentBody,
+    DocumentMeta,
+    HeadingContent,
+    Item,
+    LegalDocument,
+    ListContent,
+    ParagraphContent,
+    Section,
+    Sentence,
+    Type,
+    Type1,
+)
+from legal_document_trusted import collection_paused, dump_and_stamp, load_document  # noqa: E402
+
+DEFAULT_SIZES = [100, 1000, 10000]
+BENCH_KEY = b"bench-legal-document-load"
+CHILDREN_PER_SECTION = 9
+ULID_ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+SENTENCES = [
+    "Plaintiff moves the Court to compel discovery responses.",
+    "Defendant failed to respond within the required 30-day deadline.",
+    "See Tex. R. Civ. P. 215.",
+    "The Court in Smith v. Jones held that untimely responses may be deemed waived.",
+    "Defendant's conduct violates Tex. R. Civ. P. 193.2(a).",
+]
+
+
+def ulid(rng: random.Random) -> str:
+    return "".join(rng.choice(ULID_ALPHABET) for _ in range(26))
+
+
+def synthetic_section(rng: random.Random, level: int) -> dict:
+    kind = rng.choices(["heading", "paragraph", "list"], [0.2, 0.7, 0.1])[0]
+    if kind == "heading":
+        content: dict = {"text": "Argument and Authorities", "numbering": f"{rng.randint(1, 9)}."}
+    elif kind == "list":
+        content = {"listType": "numbered", "items": [{"text": s, "marker": f"{i}."} for i, s in enumerate(rng.sample(SENTENCES, 3), 1)]}
+    else:
+        chosen = rng.sample(SENTENCES, rng.randint(1, 4))
+        text = " ".join(chosen)
+        sentences = []
+        start = 0
+        for sentence in chosen:
+            sentences.append({"sentenceId": f"sent_{rng.getrandbits(64):016x}", "text": sentence, "start": start, "end": start + len(sentence)})
+            start += len(sentence) + 1
+        content = {"text": text, "sentences": sentences}
+    return {"sectionId": ulid(rng), "type": kind, "level": level, "content": content}
+
+
+def synthetic_document(sections: int, seed: int) -> dict:
+    """A document with about the given number of sections, a tenth of them top level."""
+    rng = random.Random(seed)
+    top = []
+    count = 0
+    while count < sections:
+        section = synthetic_section(rng, 1)
+        children = min(CHILDREN_PER_SECTION, sections - count - 1)
+        section["children"] = [synthetic_section(rng, 2) for _ in range(children)]
+        top.append(section)
+        count += 1 + children
+    return {
+        "meta": {
+            "documentId": ulid(rng),
+            "caseId": ulid(rng),
+            "type": "motion",
+            "title": "Motion to Compel Discovery",
+            "createdAt": "2025-12-27T19:52:22Z",
+            "updatedAt": "2025-12-27T19:52:22Z",
+        },
+        "body": {"sections": top},
+    }
+
+
+def best_of(repeat: int, fn: Callable[[], object]) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def construct_section(data: dict[str, Any]) -> Section:
+    content = data.get("content")
+    if content is not None:
+        if "items" in content:
+            content = ListContent.model_construct(**{**content, "items": [Item.model_construct(**item) for item in content["items"]]})
+        elif "sentences" in content:
+            sentences = content["sentences"]
+            if sentences is not None:
+                sentences = [Sentence.model_construct(**sentence) for sentence in sentences]
+            content = ParagraphContent.model_construct(**{**content, "sentences": sentences})
+        else:
+            content = HeadingContent.model_construct(**content)
+    children = data.get("children")
+    if children is not None:
+        children = [construct_section(child) for child in children]
+    return Section.model_construct(**{**data, "type": Type1(data["type"]), "content": content, "children": children})
+
+
+def construct_document(raw: bytes) -> LegalDocument:
+    """The recursive model_construct load, with no field checks, for comparison only."""
+    data = json.loads(raw)
+    meta = dict(data["meta"], type=Type(data["meta"]["type"]))
+    meta["createdAt"] = datetime.fromisoformat(meta["createdAt"])
+    meta["updatedAt"] = datetime.fromisoformat(meta["updatedAt"])
+    body = DocumentBody.model_construct(sections=[construct_section(section) for section in data["body"]["sections"]])
+    return LegalDocument.model_construct(meta=DocumentMeta.model_construct(**meta), body=body)
+
+
+def paused(fn: Callable[[], object]) -> Callable[[], object]:
+    def run() -> object:
+        with collection_paused():
+            return fn()
+
+    return run
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark LegalDocument loading with and without the cycle collector.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Document sizes in sections (default: 100 1000 10000).")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per measurement; the best is kept (default: 5).")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed for document generation.")
+    parser.add_argument("--output", default="bench_legal_document_load.json", help="Where to write the JSON results.")
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes:
+        document = LegalDocument.model_validate(synthetic_document(size, args.seed))
+        raw, stamp = dump_and_stamp(document, BENCH_KEY)
+        if construct_document(raw) != document:
+            raise SystemExit(f"model_construct walk differs from validation at {size} sections")
+        validated = best_of(args.repeat, lambda: LegalDocument.model_validate_json(raw))
+        loaded = best_of(args.repeat, paused(lambda: load_document(raw, stamp, BENCH_KEY)))
+        constructed = best_of(args.repeat, paused(lambda: construct_document(raw)))
+        results.append(
+            {
+                "sections": size,
+                "bytes": len(raw),
+                "validate_s": round(validated, 6),
+                "load_collection_paused_s": round(loaded, 6),
+                "construct_collection_paused_s": round(constructed, 6),
+                "speedup": round(validated / loaded, 2),
+                "construct_over_load": round(constructed / loaded, 2),
+            }
+        )
+        print(
+            f"{size:>6} sections ({len(raw) / 1e6:.1f} MB): validate={validated:.4f}s  load, collector paused={loaded:.4f}s  "
+            f"construct, collector paused={constructed:.4f}s  speedup={validated / loaded:.2f}x  (construct {constructed / loaded:.2f}x the load)"
+        )
+
+    data = {
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    Path(args.output).write_text(json.dumps(data, indent=2) + "\n", encoding="utf-8")
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
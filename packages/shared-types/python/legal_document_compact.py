@@ -0,0 +1,189 @@
+"""Compact sentence storage for ParagraphContent.
+
+A validated paragraph holds a Sentence object per sentence, each with its own
+copy of text that is always text[start:end] of the paragraph. CompactParagraph
+keeps the paragraph text once, the sentence boundaries as (start, end) pairs
+in an array('I'), and the sentence IDs as their 8 hash bytes packed into one
+bytes table; Sentence objects are built only when one is asked for.
+
+    compact = compact_document(document)     # drops the Sentence lists in place
+    paragraph = compact.paragraphs[section_id]
+    paragraph[0].text, paragraph.span(0), paragraph.index_of(sentence_id)
+    raw = compact.model_dump_json()          # the same str as before compacting
+    document = compact.expand()              # Sentence lists back in place
+
+Sentences whose text is not exactly its slice of the paragraph (offsets
+counted in other units, say) cannot be rebuilt from offsets, so those
+paragraphs keep their Sentence lists.
+"""
+
+from __future__ import annotations
+
+import json
+from array import array
+from collections.abc import Sequence
+from typing import Any, overload
+
+from legal_document import LegalDocument, ParagraphContent, Section, Sentence
+
+SENTENCE_ID_PREFIX = "sent_"
+SENTENCE_ID_BYTES = 8
+
+
+class CompactParagraph(Sequence[Sentence]):
+    """A paragraph's text with its sentences as offsets and packed IDs.
+
+    Indexing and iterating build Sentence objects on the fly; span(),
+    sentence_id() and index_of() read the tables without building any.
+    """
+
+    __slots__ = ("text", "offsets", "ids")
+
+    def __init__(self, text: str, offsets: array | None, ids: bytes) -> None:
+        self.text = text
+        # None when the paragraph has no sentences list at all, as opposed to an empty one.
+        self.offsets = offsets
+        self.ids = ids
+
+    @classmethod
+    def from_content(cls, content: ParagraphContent) -> CompactParagraph:
+        """Raises ValueError when a sentence cannot be rebuilt from its offsets and ID."""
+        if content.sentences is None:
+            return cls(content.text, None, b"")
+        offsets = array("I")
+        ids = bytearray()
+        for sentence in content.sentences:
+            if not 0 <= sentence.start <= sentence.end <= len(content.text):
+                raise ValueError(f"sentence {sentence.sentenceId} offsets are outside the paragraph")
+            if content.text[sentence.start : sentence.end] != sentence.text:
+                raise ValueError(f"sentence {sentence.sentenceId} text is not its paragraph slice")
+            ids += pack_sentence_id(sentence.sentenceId)
+            offsets.append(sentence.start)
+            offsets.append(sentence.end)
+        return cls(content.text, offsets, bytes(ids))
+
+    def __len__(self) -> int:
+        return 0 if self.offsets is None else len(self.offsets) // 2
+
+    @overload
+    def __getitem__(self, index: int) -> Sentence: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[Sentence]: ...
+
+    def __getitem__(self, index: int | slice) -> Sentence | list[Sentence]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(len(self))[index]]
+        index = range(len(self))[index]
+        start, end = self.span(index)
+        return Sentence.model_construct(sentenceId=self.sentence_id(index), text=self.text[start:end], start=start, end=end)
+
+    def span(self, index: int) -> tuple[int, int]:
+        assert self.offsets is not None
+        return self.offsets[2 * index], self.offsets[2 * index + 1]
+
+    def sentence_id(self, index: int) -> str:
+        at = index * SENTENCE_ID_BYTES
+        return SENTENCE_ID_PREFIX + self.ids[at : at + SENTENCE_ID_BYTES].hex()
+
+    def index_of(self, sentence_id: str) -> int:
+        """Position of the sentence with this ID; raises ValueError when absent."""
+        try:
+            needle = pack_sentence_id(sentence_id)
+        except ValueError:
+            raise ValueError(f"{sentence_id} is not in this paragraph") from None
+        at = self.ids.find(needle)
+        # A match straddling two IDs is not one; keep looking from the next byte.
+        while at != -1 and at % SENTENCE_ID_BYTES:
+            at = self.ids.find(needle, at + 1)
+        if at == -1:
+            raise ValueError(f"{sentence_id} is not in this paragraph")
+        return at // SENTENCE_ID_BYTES
+
+    @property
+    def sentences(self) -> list[Sentence] | None:
+        return None if self.offsets is None else self[:]
+
+    def to_content(self) -> ParagraphContent:
+        return ParagraphContent(text=self.text, sentences=self.sentences)
+
+    def sentence_dicts(self) -> list[dict[str, Any]] | None:
+        """The sentences as ParagraphContent.model_dump(mode="json") writes them."""
+        if self.offsets is None:
+            return None
+        dicts = []
+        for index in range(len(self)):
+            start, end = self.span(index)
+            dicts.append({"sentenceId": self.sentence_id(index), "text": self.text[start:end], "start": start, "end": end})
+        return dicts
+
+
+def pack_sentence_id(sentence_id: str) -> bytes:
+    digest = sentence_id[len(SENTENCE_ID_PREFIX) :]
+    # fromhex also accepts upper case and spaces, which would not unpack to the same ID.
+    if not sentence_id.startswith(SENTENCE_ID_PREFIX) or len(digest) != 2 * SENTENCE_ID_BYTES or digest != digest.lower():
+        raise ValueError(f"{sentence_id!r} is not a sentence ID")
+    return bytes.fromhex(digest)
+
+
+class CompactDocument:
+    """A LegalDocument whose paragraph sentences live in CompactParagraphs.
+
+    The document's ParagraphContent objects keep their text but have their
+    sentences set to None; paragraphs maps those sections' sectionId to the
+    compact form. Edit sentences through expand(), not on the stripped tree.
+    """
+
+    def __init__(self, document: LegalDocument, paragraphs: dict[str, CompactParagraph]) -> None:
+        self.document = document
+        self.paragraphs = paragraphs
+
+    def model_dump(self) -> dict[str, Any]:
+        """The document as model_dump(mode="json") of the uncompacted document."""
+        data = self.document.model_dump(mode="json")
+        stack = list(data["body"]["sections"])
+        while stack:
+            section = stack.pop()
+            paragraph = self.paragraphs.get(section["sectionId"])
+            if paragraph is not None:
+                section["content"]["sentences"] = paragraph.sentence_dicts()
+            stack.extend(section["children"] or ())
+        return data
+
+    def model_dump_json(self) -> str:
+        """The str LegalDocument.model_dump_json() gave for the uncompacted document."""
+        return json.dumps(self.model_dump(), ensure_ascii=False, separators=(",", ":"))
+
+    def expand(self) -> LegalDocument:
+        """Put the Sentence lists back in the document and return it; this wrapper is then empty."""
+        for section in iter_sections(self.document):
+            paragraph = self.paragraphs.get(section.sectionId)
+            if paragraph is not None and isinstance(section.content, ParagraphContent):
+                section.content.sentences = paragraph.sentences
+        self.paragraphs = {}
+        return self.document
+
+
+def compact_document(document: LegalDocument) -> CompactDocument:
+    """Move every paragraph's sentences into a CompactParagraph, in place."""
+    paragraphs = {}
+    for section in iter_sections(document):
+        content = section.content
+        if not isinstance(content, ParagraphContent) or content.sentences is None:
+            continue
+        try:
+            paragraphs[section.sectionId] = CompactParagraph.from_content(content)
+        except ValueError:
+            continue
+        content.sentences = None
+    return CompactDocument(document, paragraphs)
+
+
+def iter_sections(document: LegalDocument) -> list[Section]:
+    sections = []
+    stack = list(reversed(document.body.sections))
+    while stack:
+        section = stack.pop()
+        sections.append(section)
+        stack.extend(reversed(section.children or ()))
+    return sections
@@ -0,0 +1,312 @@
+"""Section-level diff and in-place patch between two LegalDocument versions.
+
+Sections are matched by sectionId and paragraph sentences by sentenceId, the
+way draft-reconciler.ts keeps sentence identity across edits in the desktop
+renderer. diff_documents() returns a list of JSON-ready operations, sized by
+the edit rather than the document, and apply_patch() replays them on the
+old version in place:
+
+    ops = diff_documents(saved, draft)
+    send(json.dumps(ops))
+    ...
+    index = apply_patch(saved, json.loads(payload), index)
+
+Operations, applied in list order:
+
+    {"op": "meta", <changed DocumentMeta fields>}
+    {"op": "insert", "parentId": p, "after": s, "section": {...}}   # children come as their own ops
+    {"op": "move", "sectionId": id, "parentId": p, "after": s}
+    {"op": "delete", "sectionId": id}                               # with its remaining children
+    {"op": "update", "sectionId": id, <changed type, level, content or children (null / [])>}
+    {"op": "text", "sectionId": id, "text": t, "sentences": [sentence ops] or null}
+
+parentId None is body.sections and after None is the first position; after
+always names a sibling already in place, so positions need no adjusting
+while the list is replayed. Sentence ops are the same insert (with the
+sentence), move, delete and update (with the changed fields) on the
+paragraph's sentences list. Sections and sentences that keep their parent
+and relative order (a longest increasing run of the old positions) get no
+op at all.
+
+apply_patch() keeps a DocumentIndex of the document in step; pass the one
+from the previous call to avoid rebuilding it. A patch that does not fit the
+document raises PatchError and may leave it partly patched.
+"""
+
+from __future__ import annotations
+
+import bisect
+from collections.abc import Iterator
+from typing import Any
+
+from legal_document import DocumentMeta, LegalDocument, ParagraphContent, Section, Sentence
+from legal_document_index import DocumentIndex, walk
+
+Op = dict[str, Any]
+
+
+class PatchError(ValueError):
+    """An operation refers to sections or sentences the document does not have."""
+
+
+# Diff.
+
+
+def diff_documents(old: LegalDocument, new: LegalDocument) -> list[Op]:
+    """Operations that turn old into new (both are left unchanged)."""
+    old_sections = section_parents(old)
+    new_sections = section_parents(new)
+    ops: list[Op] = []
+
+    old_meta = old.meta.model_dump(mode="json")
+    meta = {key: value for key, value in new.meta.model_dump(mode="json").items() if value != old_meta[key]}
+    if meta:
+        ops.append({"op": "meta", **meta})
+
+    # Parents before their children, so every insert and move lands in a
+    # section that is already in its final place.
+    parents: list[Section | None] = [None]
+    for section in new.body.sections:
+        parents.extend(walk(section))
+    for parent in parents:
+        parent_id = None if parent is None else parent.sectionId
+        children = new.body.sections if parent is None else parent.children or []
+        if parent is None:
+            old_children = old.body.sections
+        elif parent_id in old_sections:
+            old_children = old_sections[parent_id][0].children or []
+        else:
+            old_children = []
+        new_ids = [child.sectionId for child in children]
+        for section_id, after in placements([child.sectionId for child in old_children], new_ids):
+            if section_id in old_sections:
+                ops.append({"op": "move", "sectionId": section_id, "parentId": parent_id, "after": after})
+            else:
+                ops.append({"op": "insert", "parentId": parent_id, "after": after, "section": section_payload(new_sections[section_id][0])})
+
+    # Only the top of each deleted subtree; its survivors were moved out above.
+    for old_section in old.body.sections:
+        for section in walk(old_section):
+            if section.sectionId not in new_sections:
+                parent = old_sections[section.sectionId][1]
+                if parent is None or parent.sectionId in new_sections:
+                    ops.append({"op": "delete", "sectionId": section.sectionId})
+
+    for parent in parents[1:]:
+        assert parent is not None
+        if parent.sectionId in old_sections:
+            ops.extend(section_ops(old_sections[parent.sectionId][0], parent))
+    return ops
+
+
+def section_parents(document: LegalDocument) -> dict[str, tuple[Section, Section | None]]:
+    # The diff needs no sentence lookups, so a full DocumentIndex would be wasted work.
+    sections = {}
+    stack: list[tuple[Section, Section | None]] = [(section, None) for section in document.body.sections]
+    while stack:
+        section, parent = stack.pop()
+        sections[section.sectionId] = (section, parent)
+        stack.extend((child, section) for child in section.children or ())
+    return sections
+
+
+def section_ops(old: Section, new: Section) -> Iterator[Op]:
+    changed: Op = {}
+    if new.type != old.type:
+        changed["type"] = new.type.value
+    if new.level != old.level:
+        changed["level"] = new.level
+    # After the structural ops the list is whatever they left; only None against [] is still open.
+    if (new.children is None) != (old.children is None) and not new.children:
+        changed["children"] = new.children
+    if new.content != old.content:
+        if isinstance(old.content, ParagraphContent) and isinstance(new.content, ParagraphContent):
+            yield {"op": "text", "sectionId": new.sectionId, **paragraph_changes(old.content, new.content)}
+        else:
+            changed["content"] = None if new.content is None else new.content.model_dump(mode="json")
+    if changed:
+        yield {"op": "update", "sectionId": new.sectionId, **changed}
+
+
+def paragraph_changes(old: ParagraphContent, new: ParagraphContent) -> Op:
+    changes: Op = {}
+    if new.text != old.text:
+        changes["text"] = new.text
+    if new.sentences == old.sentences:
+        return changes
+    if new.sentences is None:
+        changes["sentences"] = None
+        return changes
+    old_sentences = {sentence.sentenceId: sentence for sentence in old.sentences or ()}
+    new_ids = {sentence.sentenceId for sentence in new.sentences}
+    ops: list[Op] = [{"op": "delete", "sentenceId": sentence_id} for sentence_id in old_sentences if sentence_id not in new_ids]
+    by_id = {sentence.sentenceId: sentence for sentence in new.sentences}
+    for sentence_id, after in placements(list(old_sentences), list(by_id)):
+        if sentence_id in old_sentences:
+            ops.append({"op": "move", "sentenceId": sentence_id, "after": after})
+        else:
+            ops.append({"op": "insert", "after": after, "sentence": by_id[sentence_id].model_dump(mode="json")})
+    for sentence in new.sentences:
+        before = old_sentences.get(sentence.sentenceId)
+        if before is not None and before != sentence:
+            fields = {key: value for key, value in sentence.model_dump().items() if value != getattr(before, key)}
+            ops.append({"op": "update", "sentenceId": sentence.sentenceId, **fields})
+    changes["sentences"] = ops
+    return changes
+
+
+def placements(old_ids: list[str], new_ids: list[str]) -> Iterator[tuple[str, str | None]]:
+    """(id, id of the entry it goes after) for each entry of new_ids that needs placing.
+
+    Entries of both lists whose old positions form the longest increasing run
+    in new order stay where they are; every other entry is placed after its
+    predecessor in new_ids, which is in place by then.
+    """
+    old_position = {entry: i for i, entry in enumerate(old_ids)}
+    staying = longest_increasing([entry for entry in new_ids if entry in old_position], old_position)
+    after = None
+    for entry in new_ids:
+        if entry not in staying:
+            yield entry, after
+        after = entry
+
+
+def longest_increasing(entries: list[str], position: dict[str, int]) -> set[str]:
+    tails: list[int] = []
+    tail_entries: list[int] = []
+    previous: list[int] = []
+    for i, entry in enumerate(entries):
+        at = bisect.bisect_left(tails, position[entry])
+        if at == len(tails):
+            tails.append(position[entry])
+            tail_entries.append(i)
+        else:
+            tails[at] = position[entry]
+            tail_entries[at] = i
+        previous.append(tail_entries[at - 1] if at else -1)
+    result = set()
+    i = tail_entries[-1] if tail_entries else -1
+    while i != -1:
+        result.add(entries[i])
+        i = previous[i]
+    return result
+
+
+def section_payload(section: Section) -> dict[str, Any]:
+    data = section.model_dump(mode="json", exclude={"children"})
+    data["children"] = None if section.children is None else []
+    return data
+
+
+# Patch.
+
+
+def apply_patch(document: LegalDocument, ops: list[Op], index: DocumentIndex | None = None) -> DocumentIndex:
+    """Apply diff_documents() output to document in place; returns its index, kept up to date."""
+    index = index if index is not None else DocumentIndex(document)
+    # Sentences can move between paragraphs, so the changed ones are reindexed together at the end.
+    changed: set[str] = set()
+    for op in ops:
+        try:
+            kind = op["op"]
+            if kind == "meta":
+                patch_meta(document.meta, {key: value for key, value in op.items() if key != "op"})
+            elif kind == "insert":
+                section = Section.model_validate(op["section"])
+                content, section.content = section.content, None
+                index.insert(section, op["parentId"], placement(index, op["parentId"], op["after"]))
+                section.content = content
+                changed.add(section.sectionId)
+            elif kind == "move":
+                if op["sectionId"] == op["after"]:
+                    raise PatchError(f"section {op['sectionId']} cannot go after itself")
+                index.move(op["sectionId"], op["parentId"], placement(index, op["parentId"], op["after"], op["sectionId"]))
+            elif kind == "delete":
+                index.remove(op["sectionId"])
+            elif kind == "update":
+                if patch_section(index.section(op["sectionId"]), op):
+                    changed.add(op["sectionId"])
+            elif kind == "text":
+                patch_paragraph(index.section(op["sectionId"]), op)
+                changed.add(op["sectionId"])
+            else:
+                raise PatchError(f"unknown operation {kind!r}")
+        except KeyError as exc:
+            raise PatchError(f"{op.get('op')} operation refers to missing {exc}") from None
+    index.reindex(*(section_id for section_id in changed if section_id in index))
+    return index
+
+
+def placement(index: DocumentIndex, parent_id: str | None, after: str | None, moving: str | None = None) -> int:
+    """Position under parent_id just after the sibling after, as it will be once moving is taken out."""
+    if after is None:
+        return 0
+    parent = index.parent(after)
+    if (None if parent is None else parent.sectionId) != parent_id:
+        raise PatchError(f"section {after} is not a child of {parent_id}")
+    position = index.position(after) + 1
+    if moving is not None and index.parent(moving) is parent and index.position(moving) < position:
+        position -= 1
+    return position
+
+
+def patch_meta(meta: DocumentMeta, fields: dict[str, Any]) -> None:
+    validated = DocumentMeta.model_validate({**meta.model_dump(mode="json"), **fields})
+    for key in fields:
+        setattr(meta, key, getattr(validated, key))
+
+
+def patch_section(section: Section, op: Op) -> bool:
+    """Apply an update op; True when the content changed."""
+    validated = Section.model_validate(
+        {"sectionId": section.sectionId, "type": op.get("type", section.type), "level": op.get("level", section.level), "content": op.get("content")}
+    )
+    for key in ("type", "level", "content"):
+        if key in op:
+            setattr(section, key, getattr(validated, key))
+    if "children" in op:
+        if section.children or op["children"] not in (None, []):
+            raise PatchError(f"section {section.sectionId} children can only switch between null and []")
+        section.children = op["children"]
+    return "content" in op
+
+
+def patch_paragraph(section: Section, op: Op) -> None:
+    content = section.content
+    if not isinstance(content, ParagraphContent):
+        raise PatchError(f"section {section.sectionId} is not a paragraph")
+    if "text" in op:
+        content.text = op["text"]
+    if "sentences" not in op:
+        return
+    if op["sentences"] is None:
+        content.sentences = None
+        return
+    sentences = list(content.sentences or ())
+    for sentence_op in op["sentences"]:
+        kind = sentence_op["op"]
+        if kind == "delete":
+            del sentences[sentence_index(sentences, sentence_op["sentenceId"])]
+        elif kind == "insert":
+            sentences.insert(after_index(sentences, sentence_op["after"]), Sentence.model_validate(sentence_op["sentence"]))
+        elif kind == "move":
+            sentence = sentences.pop(sentence_index(sentences, sentence_op["sentenceId"]))
+            sentences.insert(after_index(sentences, sentence_op["after"]), sentence)
+        elif kind == "update":
+            at = sentence_index(sentences, sentence_op["sentenceId"])
+            fields = {key: value for key, value in sentence_op.items() if key != "op"}
+            sentences[at] = Sentence.model_validate({**sentences[at].model_dump(), **fields})
+        else:
+            raise PatchError(f"unknown sentence operation {kind!r}")
+    content.sentences = sentences
+
+
+def sentence_index(sentences: list[Sentence], sentence_id: str) -> int:
+    for i, sentence in enumerate(sentences):
+        if sentence.sentenceId == sentence_id:
+            return i
+    raise PatchError(f"paragraph has no sentence {sentence_id}")
+
+
+def after_index(sentences: list[Sentence], after: str | None) -> int:
+    return 0 if after is None else sentence_index(sentences, after) + 1
@@ -0,0 +1,205 @@
+"""Lookup index over a LegalDocument's sections and sentences.
+
+Finding a section or sentence by ID otherwise means walking Section.children
+from the top every time. DocumentIndex walks the tree once, iteratively, and
+then answers by dictionary lookup:
+
+    index = DocumentIndex(document)
+    index.section(section_id), index.parent(section_id), index.path(section_id)
+    index.sentence(sentence_id)              # SentenceLocation(section, index, start, end)
+
+Structural edits go through the index so the tree and the maps change
+together, at the cost of the sections touched rather than a rebuild:
+
+    index.insert(section, parent_id, position)
+    index.move(section_id, parent_id, position)
+    index.remove(section_id)
+    index.reindex(section_id, ...)           # after editing paragraphs' sentences
+
+A parent_id of None means body.sections. Paths hold sectionIds from the top
+level down and are derived from parent links on request, so moving a
+section does not touch its descendants' entries. Pass the paragraphs of a
+CompactDocument to index sentences held in compact form.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterator, Mapping
+from dataclasses import dataclass
+from typing import NamedTuple
+
+from legal_document import LegalDocument, ParagraphContent, Section
+from legal_document_compact import CompactParagraph
+
+
+@dataclass(slots=True)
+class SectionEntry:
+    section: Section
+    parent: Section | None
+    # Sentence IDs indexed for this section, so they can be dropped after its content changed.
+    sentence_ids: tuple[str, ...]
+
+
+class SentenceLocation(NamedTuple):
+    section: Section
+    index: int
+    start: int
+    end: int
+
+
+class DocumentIndex:
+    """sectionId and sentenceId maps over one document, kept in step with edits made through it.
+
+    Unknown IDs raise KeyError; duplicate IDs and moves into a section's own
+    subtree raise ValueError and leave the tree and index unchanged.
+    """
+
+    def __init__(self, document: LegalDocument, paragraphs: Mapping[str, CompactParagraph] | None = None) -> None:
+        self.document = document
+        self.paragraphs = paragraphs if paragraphs is not None else {}
+        self.sections: dict[str, SectionEntry] = {}
+        self.sentences: dict[str, SentenceLocation] = {}
+        for section in document.body.sections:
+            self._add(section, None)
+
+    def __len__(self) -> int:
+        return len(self.sections)
+
+    def __contains__(self, section_id: object) -> bool:
+        return section_id in self.sections
+
+    # Lookups.
+
+    def section(self, section_id: str) -> Section:
+        return self.sections[section_id].section
+
+    def parent(self, section_id: str) -> Section | None:
+        return self.sections[section_id].parent
+
+    def path(self, section_id: str) -> list[str]:
+        path = [section_id]
+        parent = self.sections[section_id].parent
+        while parent is not None:
+            path.append(parent.sectionId)
+            parent = self.sections[parent.sectionId].parent
+        path.reverse()
+        return path
+
+    def position(self, section_id: str) -> int:
+        """Index of the section among its siblings."""
+        entry = self.sections[section_id]
+        return identity_index(self._siblings(entry.parent), entry.section)
+
+    def sentence(self, sentence_id: str) -> SentenceLocation:
+        return self.sentences[sentence_id]
+
+    # Edits.
+
+    def insert(self, section: Section, parent_id: str | None = None, position: int | None = None) -> None:
+        """Add section, with its children, under parent_id at position (as list.insert; None appends)."""
+        parent = None if parent_id is None else self.sections[parent_id].section
+        self._add(section, parent)
+        siblings = self._siblings(parent, create=True)
+        siblings.insert(len(siblings) if position is None else position, section)
+
+    def move(self, section_id: str, parent_id: str | None = None, position: int | None = None) -> None:
+        """Move a section, with its children, under parent_id at position among the siblings it lands in."""
+        entry = self.sections[section_id]
+        parent = None if parent_id is None else self.sections[parent_id].section
+        if parent_id is not None and section_id in self.path(parent_id):
+            raise ValueError(f"cannot move section {section_id} into its own subtree")
+        old_siblings = self._siblings(entry.parent)
+        del old_siblings[identity_index(old_siblings, entry.section)]
+        entry.parent = parent
+        siblings = self._siblings(parent, create=True)
+        siblings.insert(len(siblings) if position is None else position, entry.section)
+
+    def remove(self, section_id: str) -> Section:
+        """Detach a section, with its children, and return it."""
+        entry = self.sections[section_id]
+        siblings = self._siblings(entry.parent)
+        del siblings[identity_index(siblings, entry.section)]
+        for section in walk(entry.section):
+            for sentence_id in self.sections.pop(section.sectionId).sentence_ids:
+                del self.sentences[sentence_id]
+        return entry.section
+
+    def reindex(self, *section_ids: str) -> None:
+        """Re-read sections' sentences after their content was changed in place.
+
+        The sections are re-read together, so a sentence that moved between
+        them is not taken for a duplicate.
+        """
+        entries = [self.sections[section_id] for section_id in dict.fromkeys(section_ids)]
+        stale = {sentence_id for entry in entries for sentence_id in entry.sentence_ids}
+        located: dict[str, SentenceLocation] = {}
+        sentence_ids = []
+        for entry in entries:
+            ids = []
+            for sentence_id, location in self._locate_sentences(entry.section):
+                if sentence_id in located or (sentence_id in self.sentences and sentence_id not in stale):
+                    raise ValueError(f"duplicate sentenceId {sentence_id}")
+                located[sentence_id] = location
+                ids.append(sentence_id)
+            sentence_ids.append(tuple(ids))
+        for sentence_id in stale:
+            del self.sentences[sentence_id]
+        self.sentences.update(located)
+        for entry, ids in zip(entries, sentence_ids):
+            entry.sentence_ids = ids
+
+    # Internals.
+
+    def _add(self, root: Section, parent: Section | None) -> None:
+        sections: dict[str, SectionEntry] = {}
+        sentences: dict[str, SentenceLocation] = {}
+        stack = [(root, parent)]
+        while stack:
+            section, parent = stack.pop()
+            if section.sectionId in sections or section.sectionId in self.sections:
+                raise ValueError(f"duplicate sectionId {section.sectionId}")
+            located = self._locate_sentences(section)
+            for sentence_id, location in located:
+                if sentence_id in sentences or sentence_id in self.sentences:
+                    raise ValueError(f"duplicate sentenceId {sentence_id}")
+                sentences[sentence_id] = location
+            sections[section.sectionId] = SectionEntry(section, parent, tuple(sentence_id for sentence_id, _ in located))
+            stack.extend((child, section) for child in reversed(section.children or ()))
+        # Only once the whole subtree checked out, so a failed insert changes nothing.
+        self.sections.update(sections)
+        self.sentences.update(sentences)
+
+    def _locate_sentences(self, section: Section) -> list[tuple[str, SentenceLocation]]:
+        compact = self.paragraphs.get(section.sectionId)
+        if compact is not None:
+            return [(compact.sentence_id(i), SentenceLocation(section, i, *compact.span(i))) for i in range(len(compact))]
+        content = section.content
+        if not isinstance(content, ParagraphContent) or not content.sentences:
+            return []
+        return [(s.sentenceId, SentenceLocation(section, i, s.start, s.end)) for i, s in enumerate(content.sentences)]
+
+    def _siblings(self, parent: Section | None, create: bool = False) -> list[Section]:
+        if parent is None:
+            return self.document.body.sections
+        if parent.children is None:
+            if not create:
+                return []
+            parent.children = []
+        return parent.children
+
+
+def walk(root: Section) -> Iterator[Section]:
+    """root and its descendants, depth first in document order, without recursion."""
+    stack = [root]
+    while stack:
+        section = stack.pop()
+        yield section
+        stack.extend(reversed(section.children or ()))
+
+
+def identity_index(sections: list[Section], section: Section) -> int:
+    # list.index compares models field by field; the node itself is what is wanted.
+    for i, candidate in enumerate(sections):
+        if candidate is section:
+            return i
+    raise ValueError(f"section {section.sectionId} is not among its parent's children")
@@ -0,0 +1,202 @@
+"""Streaming LegalDocument loader: meta first, then one top-level Section at a time.
+
+LegalDocument.model_validate_json needs the whole JSON text and builds the
+whole Section tree before returning. DocumentStream reads a file or socket in
+bounded chunks, validates meta as soon as it has arrived, and then yields each
+element of body.sections as a validated Section once its closing brace is in,
+so peak memory is about one top-level section plus one chunk.
+
+    with open(path, "rb") as source:
+        stream = DocumentStream(source)
+        print(stream.meta.title)
+        for section in stream:
+            index(section)
+
+Keys other than meta and body.sections are skipped, as validation ignores
+them. Sections that arrive before meta (a body written first) are held until
+meta is read.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from typing import Iterator, Protocol
+
+from legal_document import DocumentMeta, Section
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+WHITESPACE = b" \t\r\n"
+# Scanning a container only needs its brackets: each match runs up to the
+# next bracket outside a string, which group 1 captures, or to a lone quote
+# opening a string that is not fully buffered yet.
+STRING_VALUE = re.compile(rb'"[^"\\]*+(?:\\.[^"\\]*+)*+"', re.DOTALL)
+CONTAINER_TOKEN = re.compile(rb'(?:[^"{}\[\]]++|"[^"\\]*+(?:\\.[^"\\]*+)*+")*+([{}\[\]"])', re.DOTALL)
+SCALAR_END = re.compile(rb"[\s,}\]]")
+
+
+class Readable(Protocol):
+    def read(self, size: int, /) -> bytes: ...
+
+
+class Receivable(Protocol):
+    def recv(self, size: int, /) -> bytes: ...
+
+
+class DocumentStreamError(ValueError):
+    """The input is not a LegalDocument JSON object (validation errors are raised as is)."""
+
+
+class DocumentStream:
+    """A LegalDocument read incrementally from a binary file or socket.
+
+    meta is validated in the constructor; iterating yields the top-level
+    sections of body.sections in order, each validated with its children.
+    A stream can be iterated once.
+    """
+
+    def __init__(self, source: Readable | Receivable, chunk_size: int = DEFAULT_CHUNK_SIZE) -> None:
+        self._read = source.read if hasattr(source, "read") else source.recv
+        self.chunk_size = chunk_size
+        self.buffer = bytearray()
+        self.pos = 0
+        self.eof = False
+        self.meta: DocumentMeta | None = None
+        self._pending: list[Section] = []
+        self._events = self._parse()
+        for event in self._events:
+            if isinstance(event, DocumentMeta):
+                self.meta = event
+                break
+            self._pending.append(event)
+        if self.meta is None:
+            raise DocumentStreamError("document has no meta")
+
+    def __iter__(self) -> Iterator[Section]:
+        pending, self._pending = self._pending, []
+        yield from pending
+        yield from self._events
+
+    # Buffer.
+
+    def _fill(self) -> bool:
+        """Read one more chunk; False at end of input."""
+        if self.eof:
+            return False
+        chunk = self._read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        # Drop consumed bytes only once they are most of the buffer, so a
+        # section spanning many chunks is not copied again on every read.
+        if self.pos > len(self.buffer) // 2:
+            del self.buffer[: self.pos]
+            self.pos = 0
+        self.buffer += chunk
+        return True
+
+    def _peek(self) -> int:
+        """Next non-whitespace byte, without consuming it."""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                raise DocumentStreamError("unexpected end of document")
+
+    def _expect(self, char: bytes) -> None:
+        if self._peek() != char[0]:
+            raise DocumentStreamError(f"expected {char.decode()!r} at byte {self.pos}, found {chr(self.buffer[self.pos])!r}")
+        self.pos += 1
+
+    def _value(self) -> bytes:
+        """Consume one JSON value and return its raw bytes."""
+        first = self._peek()
+        # Scan offsets are kept relative to self.pos, which _fill may move.
+        rel = 0
+        depth = 0
+        while True:
+            if first in b"{[":
+                # Matched from a known position outside any string, never searched for.
+                while (m := CONTAINER_TOKEN.match(self.buffer, self.pos + rel)) is not None:
+                    token = self.buffer[m.start(1)]
+                    if token == 0x22:
+                        # A string running past the buffered bytes: rescan it after the next read.
+                        rel = m.start(1) - self.pos
+                        break
+                    rel = m.end() - self.pos
+                    depth += 1 if token in b"{[" else -1
+                    if depth == 0:
+                        return self._take(rel)
+                else:
+                    rel = len(self.buffer) - self.pos
+            elif first == 0x22:
+                m = STRING_VALUE.match(self.buffer, self.pos)
+                if m is not None:
+                    return self._take(m.end() - self.pos)
+            else:
+                m = SCALAR_END.search(self.buffer, self.pos + rel)
+                if m is not None:
+                    return self._take(m.start() - self.pos)
+                rel = len(self.buffer) - self.pos
+            if not self._fill():
+                if first in b'{["':
+                    raise DocumentStreamError("unexpected end of document")
+                return self._take(len(self.buffer) - self.pos)
+
+    def _take(self, size: int) -> bytes:
+        value = bytes(self.buffer[self.pos : self.pos + size])
+        self.pos += size
+        return value
+
+    def _members(self) -> Iterator[str]:
+        """Keys of the object starting here; the caller consumes each value."""
+        self._expect(b"{")
+        if self._peek() == 0x7D:
+            self.pos += 1
+            return
+        while True:
+            if self._peek() != 0x22:
+                raise DocumentStreamError(f"expected an object key at byte {self.pos}")
+            key = json.loads(self._value())
+            self._expect(b":")
+            yield key
+            if self._peek() == 0x2C:
+                self.pos += 1
+                continue
+            self._expect(b"}")
+            return
+
+    def _elements(self) -> Iterator[None]:
+        """Once per element of the array starting here; the caller consumes each."""
+        self._expect(b"[")
+        if self._peek() == 0x5D:
+            self.pos += 1
+            return
+        while True:
+            yield
+            if self._peek() == 0x2C:
+                self.pos += 1
+                continue
+            self._expect(b"]")
+            return
+
+    def _parse(self) -> Iterator[DocumentMeta | Section]:
+        seen_sections = False
+        for key in self._members():
+            if key == "meta":
+                yield DocumentMeta.model_validate_json(self._value())
+            elif key == "body":
+                for body_key in self._members():
+                    if body_key == "sections":
+                        seen_sections = True
+                        for _ in self._elements():
+                            yield Section.model_validate_json(self._value())
+                    else:
+                        self._value()
+            else:
+                self._value()
+        if not seen_sections:
+            raise DocumentStreamError("document has no body.sections")
@@ -0,0 +1,96 @@
+"""Stamped saving and loading for LegalDocument JSON this platform wrote.
+
+A document is stamped when it is dumped, so a later load can tell bytes our
+own services wrote from bytes that were changed or written elsewhere:
+
+    raw, stamp = dump_and_stamp(document, key)       # when saving
+    document = load_document(raw, stamp, key)        # when loading
+
+A stamp is "v2:<HMAC-SHA256 of the JSON bytes>". The key is what makes a
+stamp mean "written by us": a plain hash could be computed by any writer, so
+there is no keyless mode.
+
+Loads are always fully validated. Skipping the field checks for stamped bytes
+was measured and dropped: with the cycle collector paused on both sides, a
+core schema with the constraints stripped was about 1.1x faster than
+LegalDocument.model_validate_json at 10k sections and no faster at 1k, and a
+Python-level model_construct walk was 1.8-2.1x slower. Neither is worth a
+second way to build the models.
+
+What does help on large documents is the cycle collector, which otherwise
+walks the half-built tree over and over and takes most of the load time.
+collection_paused() stops it around a load; it is process-wide, so it is left
+to the caller:
+
+    with collection_paused():
+        document = load_document(raw, stamp, key)
+
+bench_legal_document_load.py times both.
+"""
+
+from __future__ import annotations
+
+import gc
+import hashlib
+import hmac
+import threading
+from contextlib import contextmanager
+from typing import Iterator
+
+from legal_document import LegalDocument
+
+STAMP_VERSION = "v2"
+
+_PAUSE_LOCK = threading.Lock()
+_pauses = 0
+_collector_was_enabled = False
+
+
+class UntrustedDocumentError(ValueError):
+    """The document bytes do not match their stamp."""
+
+
+def document_stamp(raw: bytes, key: bytes) -> str:
+    digest = hmac.new(key, raw, hashlib.sha256).hexdigest()
+    return f"{STAMP_VERSION}:{digest}"
+
+
+def verify_stamp(raw: bytes, stamp: str, key: bytes) -> bool:
+    return hmac.compare_digest(document_stamp(raw, key), stamp)
+
+
+def dump_and_stamp(document: LegalDocument, key: bytes) -> tuple[bytes, str]:
+    """Serialize a document and stamp the bytes as written by the key holder."""
+    raw = document.model_dump_json().encode("utf-8")
+    return raw, document_stamp(raw, key)
+
+
+def load_document(raw: bytes | str, stamp: str | None, key: bytes) -> LegalDocument:
+    """Validate raw into a LegalDocument; raises UntrustedDocumentError when a stamp is given and does not match."""
+    if isinstance(raw, str):
+        raw = raw.encode("utf-8")
+    if stamp is not None and not verify_stamp(raw, stamp, key):
+        raise UntrustedDocumentError("document does not match its stamp")
+    return LegalDocument.model_validate_json(raw)
+
+
+@contextmanager
+def collection_paused() -> Iterator[None]:
+    """Keep the cycle collector off for the block, in every thread.
+
+    Overlapping blocks share one pause, and the collector comes back on when
+    the last of them ends, if it was on before the first.
+    """
+    global _pauses, _collector_was_enabled
+    with _PAUSE_LOCK:
+        if not _pauses:
+            _collector_was_enabled = gc.isenabled()
+            gc.disable()
+        _pauses += 1
+    try:
+        yield
+    finally:
+        with _PAUSE_LOCK:
+            _pauses -= 1
+            if not _pauses and _collector_was_enabled:
+                gc.enable()